@@ -0,0 +1,10 @@
+import asyncio
+from schemas.referrals import backfill_referrer_fields
+
+async def backfill_referrers():
+    print("🔁 Backfilling referrer name and email on referrals")
+    modified = await backfill_referrer_fields()
+    print(f"✅ Updated {modified} referral(s).")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_referrers())
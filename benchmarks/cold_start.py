@@ -0,0 +1,96 @@
+"""
+Cold start benchmark.
+
+Reports two numbers for the app, each the median of --repeat runs:
+
+* import cost of `main`, from `python -X importtime` (total self time, plus
+  the heaviest top-level imports by cumulative time);
+* time to first successful response: from spawning uvicorn to the first 200
+  from --path.
+
+Index creation is skipped at startup (ENSURE_INDEXES_ON_STARTUP=false) so
+the figure does not depend on a reachable Mongo. Prints one JSON object.
+
+    python benchmarks/cold_start.py --repeat 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total_us, top_level = 0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        # Top-level imports are the ones with a single space of indentation.
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative_us)
+    return total_us, top_level
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response(path, timeout):
+    port = free_port()
+    env = dict(os.environ, ENSURE_INDEXES_ON_STARTUP="false")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.01)
+        raise TimeoutError(f"No 200 from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--path", default="/openapi.json")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--top", type=int, default=10, help="heaviest top-level imports to list")
+    args = parser.parse_args()
+
+    totals, first_responses, top_level = [], [], {}
+    for _ in range(args.repeat):
+        total_us, top_level = import_times()
+        totals.append(total_us)
+        first_responses.append(time_to_first_response(args.path, args.timeout))
+
+    heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    print(json.dumps({
+        "runs": args.repeat,
+        "import_main_ms": round(statistics.median(totals) / 1000, 1),
+        "first_response_ms": round(statistics.median(first_responses) * 1000, 1),
+        "first_response_path": args.path,
+        "heaviest_imports_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+    }, indent=2))
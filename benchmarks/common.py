@@ -0,0 +1,10 @@
+"""Helpers shared by the benchmark scripts."""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of latencies in seconds, returned in milliseconds."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 2)
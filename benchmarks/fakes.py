@@ -0,0 +1,134 @@
+"""
+Local stand-ins for external services, used by the benchmark suite.
+
+FakeDriveService implements the slice of the Drive v3 client the app uses
+(files().list/create/update/get_media, resumable media uploads, batch
+requests) in memory, with an optional per-call latency to mimic the real
+API. Downloads return zero bytes of the uploaded size. Install it with
+schemas.gdrive_upload.set_drive_service().
+"""
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+
+class FakeRequest:
+    # No Google credentials: gdrive_upload then calls execute()/next_chunk()
+    # without an authorized Http.
+    http = SimpleNamespace(credentials=None)
+
+    def __init__(self, service, method_id, action, media=None):
+        self.service = service
+        self.methodId = method_id
+        self._action = action
+        self._media = media
+        self._offset = 0
+
+    def execute(self, http=None, num_retries=0):
+        self.service.pause()
+        if self._media is not None:
+            self._media.getbytes(0, self._media.size())
+        return self._action()
+
+    def next_chunk(self, http=None, num_retries=0):
+        self.service.pause()
+        size = self._media.size()
+        chunk = self._media.getbytes(self._offset, self._media.chunksize())
+        self._offset += len(chunk)
+        if self._offset < size:
+            return SimpleNamespace(resumable_progress=self._offset, total_size=size), None
+        return None, self._action()
+
+
+class FakeFiles:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, q="", fields=None, **kwargs):
+        def action():
+            name = re.search(r"name='([^']*)'", q)
+            parent = re.search(r"'([^']*)' in parents", q)
+            with self.service.lock:
+                files = [
+                    {"id": file_id, "name": meta["name"]}
+                    for file_id, meta in self.service.files_by_id.items()
+                    if not meta.get("trashed")
+                    and (name is None or meta["name"] == name.group(1))
+                    and (parent is None or parent.group(1) in meta.get("parents", []))
+                ]
+            return {"files": files}
+        return FakeRequest(self.service, "drive.files.list", action)
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        def action():
+            file_id = uuid.uuid4().hex
+            meta = dict(body or {})
+            if media_body is not None:
+                meta["size"] = media_body.size()
+            with self.service.lock:
+                self.service.files_by_id[file_id] = meta
+            return {
+                "id": file_id,
+                "name": meta.get("name"),
+                "webViewLink": f"https://drive.example.invalid/file/d/{file_id}/view",
+            }
+        return FakeRequest(self.service, "drive.files.create", action, media_body)
+
+    def get_media(self, fileId=None, **kwargs):
+        def action():
+            with self.service.lock:
+                size = self.service.files_by_id.get(fileId, {}).get("size", 0)
+            return b"\0" * size
+        return FakeRequest(self.service, "drive.files.get_media", action)
+
+    def update(self, fileId=None, body=None, **kwargs):
+        def action():
+            with self.service.lock:
+                meta = self.service.files_by_id.setdefault(fileId, {"name": fileId})
+                meta.update(body or {})
+            return {"id": fileId}
+        return FakeRequest(self.service, "drive.files.update", action)
+
+
+class FakeBatch:
+    """One round trip for every request added, like a Drive batch request."""
+
+    def __init__(self, service, callback=None):
+        self.service = service
+        self.callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self.callback, request_id or str(len(self._requests))))
+
+    def execute(self, http=None):
+        self.service.pause()
+        for request, callback, request_id in self._requests:
+            try:
+                response, exception = request._action(), None
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class FakeDriveService:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.files_by_id = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def pause(self):
+        with self.lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def files(self):
+        return FakeFiles(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
@@ -0,0 +1,90 @@
+"""
+JSON response microbenchmark.
+
+Compares the old list-handler path (fix_id on every document, then
+jsonable_encoder, then JSONResponse) with BSONJSONResponse rendering the raw
+Motor documents, for a response of N referral-shaped documents. Prints one
+JSON object with the best-of-R timings.
+
+    python benchmarks/json_response.py --docs 10000 --rounds 10
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from schemas.responses import BSONJSONResponse
+
+
+def make_documents(count):
+    started = datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "firstName": f"First{i}",
+            "lastName": f"Last{i}",
+            "referralEmail": f"person{i}@example.com",
+            "referralPhone": "07700900000",
+            "purpose": "Remortgage",
+            "comment": "Called back, interested in a fixed rate.",
+            "referralId": f"AB{i % 500:04d}",
+            "referrerName": "Alice Broker",
+            "referrerEmail": "alice@example.com",
+            "status": ("Pending", "Approved", "Rejected")[i % 3],
+            "created_at": started + timedelta(minutes=i),
+            "uploaded_files": {
+                "payslip": {"file_name": "payslip.pdf", "google_drive_id": str(ObjectId())},
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def old_path(documents):
+    items = []
+    for doc in documents:
+        doc["_id"] = str(doc["_id"])
+        items.append(doc)
+    return JSONResponse(jsonable_encoder(items)).body
+
+
+def new_path(documents):
+    return BSONJSONResponse(documents).body
+
+
+def best_of(fn, documents, rounds, mutates):
+    timings = []
+    for _ in range(rounds):
+        docs = copy.deepcopy(documents) if mutates else documents
+        started = time.perf_counter()
+        body = fn(docs)
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    old_seconds, old_bytes = best_of(old_path, documents, args.rounds, mutates=True)
+    new_seconds, new_bytes = best_of(new_path, documents, args.rounds, mutates=False)
+
+    print(json.dumps({
+        "documents": args.docs,
+        "fix_id_jsonable_encoder_ms": round(old_seconds * 1000, 2),
+        "bson_json_response_ms": round(new_seconds * 1000, 2),
+        "speedup": round(old_seconds / new_seconds, 1),
+        "old_body_bytes": old_bytes,
+        "new_body_bytes": new_bytes,
+    }, indent=2))
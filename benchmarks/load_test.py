@@ -0,0 +1,333 @@
+"""
+Load-test suite for the real `main.app`, run against local stand-ins.
+
+* Mongo: a local mongod (--mongo-url, default mongodb://127.0.0.1:27017,
+  using a throwaway --db-name that is dropped afterwards), or an in-process
+  Motor fake with --in-process-mongo (needs the mongomock-motor package;
+  with pymongo 4.11+ it rejects the counters' bulk writes, so the run
+  checks for that first and refuses rather than reporting 500s).
+* Drive: benchmarks.fakes.FakeDriveService, with --drive-latency per call.
+* SMTP: schemas.smtp_sink.SMTPSink on a free local port.
+
+Virtual users pick requests from a weighted mix of /token, /user/me,
+/admin/referrals, /submit-referral and /submit_mortgage_with_docs for
+--duration seconds. Results are per-endpoint throughput and p50/p95/p99
+latency as JSON, optionally written to --output and compared against an
+earlier run with --compare. Each endpoint also reports its first error,
+and the script exits non-zero when any endpoint failed every request.
+
+    python benchmarks/load_test.py --concurrency 32 --duration 30 --output run.json
+    python benchmarks/load_test.py --compare run.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import percentile
+from fakes import FakeDriveService
+
+DEFAULT_MIX = "token=5,user_me=40,admin_referrals=25,submit_referral=20,submit_mortgage=10"
+ADMIN = {"email": "bench-admin@example.com", "password": "bench-admin-password"}
+USER = {"email": "bench-user@example.com", "password": "bench-user-password"}
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+async def op_token(client, ctx):
+    return await client.post("/token", data={"username": USER["email"], "password": USER["password"]})
+
+
+async def op_user_me(client, ctx):
+    return await client.get("/user/me", headers=ctx["user_headers"])
+
+
+async def op_admin_referrals(client, ctx):
+    return await client.get("/admin/referrals", params={"limit": 50}, headers=ctx["admin_headers"])
+
+
+async def op_submit_referral(client, ctx):
+    n = random.randrange(10**9)
+    return await client.post("/submit-referral", headers=ctx["user_headers"], json={
+        "firstName": "Bench",
+        "lastName": f"Referral{n}",
+        "referralEmail": f"referral{n}@example.com",
+        "referralPhone": "07700900000",
+        "purpose": "Remortgage",
+    })
+
+
+async def op_submit_mortgage(client, ctx):
+    payload = ctx["document"]
+    return await client.post("/submit_mortgage_with_docs", headers=ctx["user_headers"], data={
+        "customerName": "Bench Customer",
+        "customerEmail": "customer@example.com",
+        "customerPhone": "07700900001",
+        "loanAmount": "250000",
+    }, files={
+        "id_proof": ("id.pdf", payload, "application/pdf"),
+        "address_proof": ("address.pdf", payload, "application/pdf"),
+        "bank_statement": ("bank.pdf", payload, "application/pdf"),
+        "payslip": ("payslip.pdf", payload, "application/pdf"),
+    })
+
+
+OPERATIONS = {
+    "token": op_token,
+    "user_me": op_user_me,
+    "admin_referrals": op_admin_referrals,
+    "submit_referral": op_submit_referral,
+    "submit_mortgage": op_submit_mortgage,
+}
+
+
+async def seed(args):
+    from config.database import users_collection, referrals_collection, db
+    from schemas.user_auth import hash_password_async
+
+    if not args.in_process_mongo:
+        await db.client.drop_database(args.db_name)
+
+    now = datetime.utcnow()
+    await users_collection.insert_many([
+        {
+            "_id": str(uuid4()), "name": "Bench Admin", "email": ADMIN["email"],
+            "password": await hash_password_async(ADMIN["password"]),
+            "referralId": "BA0001", "roles": ["admin", "user"], "created_at": now,
+        },
+        {
+            "_id": str(uuid4()), "name": "Bench User", "email": USER["email"],
+            "password": await hash_password_async(USER["password"]),
+            "referralId": "BU0001", "roles": ["user", "customer"], "created_at": now,
+        },
+    ])
+    await referrals_collection.insert_many([
+        {
+            "_id": str(uuid4()), "firstName": "Seed", "lastName": f"Referral{i}",
+            "referralEmail": f"seed{i}@example.com", "purpose": "Purchase",
+            "referralId": "BU0001", "referrerName": "Bench User", "referrerEmail": USER["email"],
+            "status": ("Pending", "Approved", "Rejected")[i % 3],
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i in range(args.seed_referrals)
+    ])
+
+
+async def login(client, creds):
+    response = await client.post("/token", data={"username": creds["email"], "password": creds["password"]})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def virtual_user(client, ctx, mix, deadline, record):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await OPERATIONS[name](client, ctx)
+            error = f"{response.status_code} {response.text[:500]}" if response.status_code >= 400 else None
+        except Exception as e:
+            error = repr(e)
+        record(name, time.perf_counter() - started, error)
+
+
+async def check_in_process_mongo():
+    """mongomock-motor can't run the counters' bulk writes with pymongo 4.11+."""
+    from pymongo import UpdateOne
+    from config.database import db
+
+    try:
+        await db["_bench_probe"].bulk_write([UpdateOne({"_id": 1}, {"$inc": {"n": 1}}, upsert=True)])
+    except Exception as e:
+        import pymongo
+        raise SystemExit(
+            f"--in-process-mongo can't run the app's bulk writes with pymongo {pymongo.version}: {e!r}\n"
+            "Use a local mongod (--mongo-url), or install pymongo<4.11 in a separate environment."
+        )
+    await db["_bench_probe"].drop()
+
+
+async def run(args):
+    import httpx
+    import main
+
+    mix = parse_mix(args.mix)
+    if args.in_process_mongo:
+        await check_in_process_mongo()
+    async with main.app.router.lifespan_context(main.app):
+        await seed(args)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            ctx = {
+                "admin_headers": await login(client, ADMIN),
+                "user_headers": await login(client, USER),
+                "document": os.urandom(args.file_size),
+            }
+
+            samples = {name: [] for name in mix}
+            errors = {name: 0 for name in mix}
+            first_errors = {}
+            recording = False
+
+            def record(name, seconds, error):
+                if not recording:
+                    return
+                samples[name].append(seconds)
+                if error is not None:
+                    errors[name] += 1
+                    first_errors.setdefault(name, error)
+
+            if args.warmup:
+                deadline = time.perf_counter() + args.warmup
+                await asyncio.gather(*(virtual_user(client, ctx, mix, deadline, record) for _ in range(args.concurrency)))
+
+            recording = True
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(virtual_user(client, ctx, mix, deadline, record) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+        if not args.in_process_mongo and not args.keep_data:
+            from config.database import db
+            await db.client.drop_database(args.db_name)
+
+    endpoints = {
+        name: {
+            "requests": len(latencies),
+            "errors": errors[name],
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "first_error": first_errors.get(name),
+        }
+        for name, latencies in samples.items()
+    }
+    total = sum(len(latencies) for latencies in samples.values())
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "mix": mix,
+            "mongo": "in-process" if args.in_process_mongo else args.mongo_url,
+            "drive_latency_s": args.drive_latency,
+            "file_size_bytes": args.file_size,
+        },
+        "total": {
+            "requests": total,
+            "errors": sum(errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def compare(current, baseline):
+    """Per-endpoint change against an earlier run, as ratios (current / baseline)."""
+    changes = {}
+    for name, stats in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            metric: round(stats[metric] / before[metric], 3) if stats[metric] and before[metric] else None
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+        }
+    return changes
+
+
+def configure_environment(args):
+    """Point the app at the stand-ins. Must run before `main` is imported."""
+    from schemas.smtp_sink import SMTPSink
+
+    sink = SMTPSink(delay=args.smtp_delay).start()
+    host, port = sink.address
+    os.environ.update({
+        "SMTP_HOST": host,
+        "SMTP_PORT": str(port),
+        "SMTP_USE_SSL": "false",
+        "email_address": "bench@example.com",
+        "email_password": "bench",
+        "MONGO_URL": args.mongo_url,
+        "MONGO_DB_NAME": args.db_name,
+        "SECRET_KEY": os.environ.get("SECRET_KEY") or "bench-secret",
+        "ALGORITHM": os.environ.get("ALGORITHM") or "HS256",
+    })
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    if args.in_process_mongo:
+        os.environ["ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+    from schemas.gdrive_upload import set_drive_service
+    set_drive_service(FakeDriveService(latency=args.drive_latency))
+
+    if args.in_process_mongo:
+        from mongomock_motor import AsyncMongoMockClient
+        from config.database import main_client
+        main_client.use_client(AsyncMongoMockClient())
+    return sink
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations (default: {DEFAULT_MIX})")
+    parser.add_argument("--mongo-url", default="mongodb://127.0.0.1:27017")
+    parser.add_argument("--db-name", default="mortgage_bench")
+    parser.add_argument("--in-process-mongo", action="store_true")
+    parser.add_argument("--keep-data", action="store_true", help="don't drop the benchmark database afterwards")
+    parser.add_argument("--seed-referrals", type=int, default=500)
+    parser.add_argument("--drive-latency", type=float, default=0.05, help="seconds per fake Drive call")
+    parser.add_argument("--smtp-delay", type=float, default=0.0, help="seconds per message in the SMTP sink")
+    parser.add_argument("--file-size", type=int, default=256 * 1024, help="bytes per uploaded document")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--compare", help="earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    if args.db_name == "mortgage":
+        raise SystemExit("Refusing to run against the 'mortgage' database; pick a throwaway --db-name.")
+
+    sink = configure_environment(args)
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        sink.stop()
+    result["smtp_messages_received"] = len(sink.messages)
+
+    if args.compare:
+        with open(args.compare) as f:
+            result["compared_to"] = {"file": args.compare, "ratios": compare(result, json.load(f))}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+
+    broken = [
+        name for name, stats in result["endpoints"].items()
+        if stats["requests"] and stats["errors"] == stats["requests"]
+    ]
+    if broken:
+        raise SystemExit(f"Every request failed for: {', '.join(broken)}; see first_error above.")
@@ -0,0 +1,81 @@
+"""
+Login throughput benchmark.
+
+Hammers POST /token with concurrent logins against a running server and,
+at the same time, probes an unrelated endpoint to show how much password
+hashing holds up the rest of the worker. Probe latency is also measured
+with no logins running, as a baseline. Prints one JSON object.
+
+    uvicorn main:app --port 8000
+    python benchmarks/login_throughput.py --email admin@example.com --password secret
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import percentile
+
+
+async def login_worker(client, args, deadline, latencies, failures):
+    form = {"username": args.email, "password": args.password}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/token", data=form)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            failures.append(response.status_code)
+
+
+async def probe_worker(client, path, deadline, interval, latencies):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        baseline = []
+        await probe_worker(client, args.probe_path, time.perf_counter() + args.baseline_seconds, args.probe_interval, baseline)
+
+        login_latencies, failures, probe_latencies = [], [], []
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        await asyncio.gather(
+            probe_worker(client, args.probe_path, deadline, args.probe_interval, probe_latencies),
+            *(login_worker(client, args, deadline, login_latencies, failures) for _ in range(args.concurrency)),
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "logins": len(login_latencies),
+        "login_failures": len(failures),
+        "logins_per_second": round(len(login_latencies) / elapsed, 2),
+        "login_p50_ms": percentile(login_latencies, 50),
+        "login_p99_ms": percentile(login_latencies, 99),
+        "probe_path": args.probe_path,
+        "probe_baseline_p50_ms": percentile(baseline, 50),
+        "probe_baseline_p99_ms": percentile(baseline, 99),
+        "probe_under_load_p50_ms": percentile(probe_latencies, 50),
+        "probe_under_load_p99_ms": percentile(probe_latencies, 99),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of login load")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    parser.add_argument("--probe-path", default="/openapi.json")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
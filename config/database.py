@@ -1,29 +1,129 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import find_dotenv, load_dotenv
+from schemas.metrics import mongo_command_listener
+import asyncio
 import os
 
 dotenv_path = find_dotenv()
 load_dotenv(dotenv_path)
 
 MONGO_URL = os.getenv("MONGO_URL")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "mortgage")
 ANAYA_MONGO_URL = os.getenv("ANAYA_MONGO_URL")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
-db_client = AsyncIOMotorClient(MONGO_URL)
-db = db_client.mortgage
+# Connection pool settings, shared by both clients.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")  # e.g. "zstd,snappy,zlib"
+MONGO_WARMUP = os.getenv("MONGO_WARMUP", "false").lower() == "true"
 
-db_client_2 = AsyncIOMotorClient(ANAYA_MONGO_URL)
-db2 = db_client_2.Anaya_Data
 
-users_collection = db.users_collection
-referrals_collection = db.referrals_collection
-verification_collection = db.verification_collection
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [mongo_command_listener],
+    }
+    if MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = int(MONGO_MAX_IDLE_TIME_MS)
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
 
-registrations = db.registrations
-mortgage_applications_collection = db.mortgage_applications_collection
-customer_documents_collection = db.customer_documents
 
-anaya_registrations = db2.registrations
+class LazyClient:
+    """
+    A Motor client that is only created on first use, so nothing connects at
+    import time and clients the app never touches are never created.
+    connect_databases()/close_databases() manage them from the app lifespan.
+    """
 
+    def __init__(self, url: str | None, database_name: str):
+        self.url = url
+        self.database_name = database_name
+        self._client: AsyncIOMotorClient | None = None
 
+    @property
+    def client(self) -> AsyncIOMotorClient:
+        if self._client is None:
+            self._client = AsyncIOMotorClient(self.url, **client_options())
+        return self._client
+
+    @property
+    def database(self):
+        return self.client[self.database_name]
+
+    def use_client(self, client):
+        """Use an existing Motor-compatible client, e.g. an in-process fake."""
+        self.close()
+        self._client = client
+
+    async def warm_up(self):
+        """Ping the server on min-pool-size connections at once to open them."""
+        await asyncio.gather(*(
+            self.database.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))
+        ))
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class LazyDatabase:
+    """Stands in for a Motor database; resolves the client on each access."""
+
+    def __init__(self, lazy_client: LazyClient):
+        self._lazy_client = lazy_client
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_client.database, name)
+
+    def __getitem__(self, name):
+        return self._lazy_client.database[name]
+
+
+class LazyCollection:
+    """Stands in for a Motor collection; resolves the client on each access."""
+
+    def __init__(self, lazy_client: LazyClient, name: str):
+        self._lazy_client = lazy_client
+        self._name = name
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_client.database[self._name], name)
+
+
+main_client = LazyClient(MONGO_URL, MONGO_DB_NAME)
+anaya_client = LazyClient(ANAYA_MONGO_URL, "Anaya_Data")
+
+db = LazyDatabase(main_client)
+db2 = LazyDatabase(anaya_client)
+
+users_collection = LazyCollection(main_client, "users_collection")
+referrals_collection = LazyCollection(main_client, "referrals_collection")
+verification_collection = LazyCollection(main_client, "verification_collection")
+
+registrations = LazyCollection(main_client, "registrations")
+mortgage_applications_collection = LazyCollection(main_client, "mortgage_applications_collection")
+customer_documents_collection = LazyCollection(main_client, "customer_documents")
+counters_collection = LazyCollection(main_client, "counters")
+
+anaya_registrations = LazyCollection(anaya_client, "registrations")
+
+
+async def connect_databases():
+    """Create the main client at startup and optionally open its minimum pool."""
+    main_client.client  # the Anaya client stays lazy until something uses it
+    if MONGO_WARMUP:
+        await main_client.warm_up()
+
+
+def close_databases():
+    for lazy_client in (main_client, anaya_client):
+        lazy_client.close()
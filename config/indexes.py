@@ -0,0 +1,122 @@
+"""
+Index registry for the mortgage database.
+
+INDEXES lists every index the app relies on, per collection. ensure_indexes()
+applies them at startup; it is idempotent, so running it on every boot is
+cheap. QUERY_SHAPES lists the queries those indexes exist for, and
+check_query_plans() explains each one and reports any that still fall back to
+a collection scan.
+
+    python -m config.indexes           # create missing indexes
+    python -m config.indexes --check   # exit 1 if any query shape is a COLLSCAN
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from bson import ObjectId
+from config.database import db
+from schemas.pagination import encode_cursor, keyset_filter
+
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+
+INDEXES = {
+    "users_collection": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("referralId", ASCENDING)], name="referralId"),
+        IndexModel([("roles", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="roles_created_at_id"),
+    ],
+    "referrals_collection": [
+        IndexModel([("referralId", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="referralId_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="status_created_at_id"),
+    ],
+    "mortgage_applications_collection": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_id_created_at_id"),
+        IndexModel([("submitted_by", ASCENDING), ("created_at", DESCENDING)], name="submitted_by_created_at"),
+    ],
+    "counters": [
+        IndexModel([("metric", ASCENDING), ("key", ASCENDING)], name="metric_key"),
+    ],
+}
+
+# Last document of a sample page; its cursor gives the "page 2+" filters.
+_SAMPLE_CURSOR = encode_cursor({"created_at": datetime(2024, 1, 1), "_id": ObjectId("000000000000000000000000")})
+
+
+def _next_page(query: dict) -> dict:
+    return keyset_filter(query, _SAMPLE_CURSOR)
+
+
+# (name, collection, filter, sort) for each query the app issues. Values are
+# placeholders; only the shape matters to the planner. Paginated lists appear
+# twice: first page, and later pages with the keyset condition added.
+QUERY_SHAPES = [
+    ("get_user", "users_collection", {"email": "user@example.com"}, None),
+    ("generate_unique_referral_id", "users_collection", {"referralId": "XX0000"}, None),
+    ("get_all_users", "users_collection", {"roles": "user"}, {"created_at": -1, "_id": -1}),
+    ("get_all_users_next_page", "users_collection", _next_page({"roles": "user"}), {"created_at": -1, "_id": -1}),
+    ("get_my_referrals", "referrals_collection", {"referralId": "XX0000"}, None),
+    ("get_referrals_by_referral_id", "referrals_collection", {"referralId": "XX0000"}, {"created_at": -1, "_id": -1}),
+    ("get_referrals_by_referral_id_next_page", "referrals_collection", _next_page({"referralId": "XX0000"}), {"created_at": -1, "_id": -1}),
+    ("list_referrals", "referrals_collection", {}, {"created_at": -1, "_id": -1}),
+    ("list_referrals_next_page", "referrals_collection", _next_page({}), {"created_at": -1, "_id": -1}),
+    ("list_referrals_by_status", "referrals_collection", {"status": "Pending"}, {"created_at": -1, "_id": -1}),
+    ("list_referrals_by_status_next_page", "referrals_collection", _next_page({"status": "Pending"}), {"created_at": -1, "_id": -1}),
+    ("get_customer_applications", "mortgage_applications_collection", {"user_id": "user-id"}, {"created_at": -1, "_id": -1}),
+    ("get_customer_applications_next_page", "mortgage_applications_collection", _next_page({"user_id": "user-id"}), {"created_at": -1, "_id": -1}),
+    ("get_user_mortgage_applications", "mortgage_applications_collection", {"submitted_by": "user@example.com"}, {"created_at": -1}),
+]
+
+
+async def ensure_indexes():
+    """Create every registered index. Existing identical indexes are left alone."""
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            print(f"⚠️ Could not create indexes on {collection}: {e}")
+
+
+def _collscan_stages(plan) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_collscan_stages(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_collscan_stages(value) for value in plan)
+    return False
+
+
+async def check_query_plans():
+    """Explain every registered query shape; return the names that use a COLLSCAN."""
+    failures = []
+    for name, collection, query, sort in QUERY_SHAPES:
+        find = {"find": collection, "filter": query}
+        if sort:
+            find["sort"] = sort
+        explained = await db.command({"explain": find, "verbosity": "queryPlanner"})
+        if _collscan_stages(explained["queryPlanner"]["winningPlan"]):
+            failures.append(name)
+    return failures
+
+
+async def _main(check: bool):
+    if not check:
+        started = datetime.utcnow()
+        await ensure_indexes()
+        print(f"Indexes ensured in {(datetime.utcnow() - started).total_seconds():.2f}s")
+        return 0
+
+    failures = await check_query_plans()
+    for name in failures:
+        print(f"❌ {name} uses a COLLSCAN")
+    if not failures:
+        print(f"✅ All {len(QUERY_SHAPES)} query shapes use an index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main("--check" in sys.argv[1:])))
@@ -4,7 +4,7 @@ from getpass import getpass
 from passlib.context import CryptContext
 from datetime import datetime
 from config.database import users_collection
-from schemas.user_auth import hash_password
+from schemas.user_auth import hash_password_async
 
 async def create_admin_user():
     print("🔐 Admin User Creation")
@@ -28,7 +28,7 @@ async def create_admin_user():
         "name": name,
         "email": email,
         "contactnumber": contactnumber,
-        "password": hash_password(password),
+        "password": await hash_password_async(password),
         "referralId": "ADMIN",
         "roles": ["admin", "user", "customer"],
         "created_at": datetime.utcnow(),
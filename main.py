@@ -1,17 +1,44 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from routes import  user_auth, referrals, admin, user_details, mortgage_applications, save_and_upload
+from routes import  user_auth, referrals, admin, admin_export, user_details, mortgage_applications, save_and_upload, documents
 from routes.Reg import reg
+from schemas.email_outbox import outbox
+from schemas.responses import BSONJSONResponse
+from schemas.metrics import MetricsMiddleware, render_metrics
+from config.database import connect_databases, close_databases
+from config.indexes import ensure_indexes, ENSURE_INDEXES_ON_STARTUP
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await connect_databases()
+    if ENSURE_INDEXES_ON_STARTUP:
+        await ensure_indexes()
+    await outbox.start()
+    yield
+    await outbox.stop()
+    close_databases()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=BSONJSONResponse)
 
 app.include_router(user_auth.router)
 app.include_router(referrals.router)
 app.include_router(admin.router)
+app.include_router(admin_export.router)
 app.include_router(user_details.router)
 app.include_router(reg.router)
 app.include_router(mortgage_applications.router)
 app.include_router(save_and_upload.router)
+app.include_router(documents.router)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,4 +46,5 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
+app.add_middleware(MetricsMiddleware)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, List
 
 class ReferralCreate(BaseModel):
     firstName: str
@@ -10,4 +10,8 @@ class ReferralCreate(BaseModel):
     comment: Optional[str] = None
 
 class StatusUpdate(BaseModel):
+    status: str
+
+class BulkStatusUpdate(BaseModel):
+    ids: List[str]
     status: str
\ No newline at end of file
@@ -61,6 +61,15 @@ class AdminUserUpdate(BaseModel):
     name: Optional[str] = None
     contactnumber: Optional[str] = None
 
+class AdminUserBulkUpdateItem(AdminUserUpdate):
+    id: str
+
+class AdminUserBulkUpdate(BaseModel):
+    updates: List[AdminUserBulkUpdateItem]
+
+class BulkIds(BaseModel):
+    ids: List[str]
+
 
 ALLOWED_REFERRAL_STATUSES = {"Pending", "Approved", "Rejected"}
 
@@ -0,0 +1,10 @@
+import asyncio
+from schemas.counters import rebuild_counters
+
+async def rebuild_all_counters():
+    print("🔁 Rebuilding dashboard counters")
+    written = await rebuild_counters()
+    print(f"✅ Rebuilt {written} counter(s).")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_all_counters())
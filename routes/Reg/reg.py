@@ -2,12 +2,13 @@ from fastapi import APIRouter
 from config.database import registrations
 from routes.Reg.reg_model import Registration
 from datetime import datetime
-import pytz
 
 router = APIRouter()
 
 @router.post("/api/register")
 async def register_user(data: Registration):
+    import pytz  # loaded on first registration rather than at startup
+
     # Get UK timezone
     uk_timezone = pytz.timezone("Europe/London")
     current_time = datetime.now(uk_timezone)
@@ -1,9 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, status as http_status
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
 from config.database import users_collection, referrals_collection, mortgage_applications_collection
-from models.referral_models import StatusUpdate
-from models.user_models import _normalize_status, ALLOWED_REFERRAL_STATUSES
-from schemas.user_auth import requires_roles
+from models.referral_models import StatusUpdate, BulkStatusUpdate
+from models.user_models import _normalize_status, ALLOWED_REFERRAL_STATUSES, AdminUserBulkUpdate, BulkIds
+from schemas.user_auth import requires_roles, invalidate_user, auth_cache_stats
+from schemas.referrals import sync_referrer_fields, sync_referrer_names
+from schemas.counters import read_stats, record_referral_status_change, record_referral_status_changes
+from pymongo import ReturnDocument, UpdateOne, DeleteOne
+from schemas.pagination import SORT, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_filter, page
+from schemas.responses import BSONJSONResponse
+from schemas.storage import storage_for
+from schemas.document_bundle import stream_bundle
 from datetime import datetime
 from typing import Optional
 
@@ -13,16 +21,40 @@ router = APIRouter(
     dependencies=[Depends(requires_roles(["admin"]))]
     )
 
-def fix_id(doc):
-    doc["_id"] = str(doc["_id"])
-    return doc
+MAX_BULK_IDS = 1000
+
+def limit_query(description="Page size"):
+    return Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description=description)
+
+def unique_ids(ids):
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No IDs provided.")
+    if len(ids) > MAX_BULK_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_IDS} IDs per request.")
+    return ids
+
+
+@router.get("/auth-cache-stats")
+async def get_auth_cache_stats():
+    return auth_cache_stats()
+
+
+@router.get("/stats")
+async def get_stats(days: int = Query(30, ge=1, le=366, description="Days of per-day referral counts")):
+    return await read_stats(days)
 
 
 @router.get("/users/{role}")
-async def get_all_users(role: str):
-    users_cursor = users_collection.find({"roles": role})
-    users = [fix_id(user) async for user in users_cursor]
-    return users
+async def get_all_users(
+    role: str,
+    limit: int = limit_query(),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    users = await users_collection.find(
+        keyset_filter({"roles": role}, cursor)
+    ).sort(SORT).limit(limit + 1).to_list(length=limit + 1)
+    return BSONJSONResponse(page(users, limit))
 
 @router.put("/users/{user_id}")
 async def update_user(user_id: str, body: dict):
@@ -45,41 +77,201 @@ async def update_user(user_id: str, body: dict):
     user = await users_collection.find_one({"_id": user_id}, {"password": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return fix_id(user)
+    invalidate_user(user.get("email"))
+    if "name" in updates:
+        await sync_referrer_fields(user.get("referralId"), name=updates["name"])
+    return BSONJSONResponse(user)
 
 @router.delete("/users/{user_id}")
 async def delete_user(user_id: str):
-    result = await users_collection.delete_one({"_id": user_id})
-    if result.deleted_count == 0:
+    user = await users_collection.find_one_and_delete({"_id": user_id}, projection={"email": 1})
+    if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_user(user.get("email"))
     return {"message": "User deleted"}
 
 
 @router.get("/referrals/{referral_id}")
-async def get_referrals_by_referral_id(referral_id: str):
-    referrals_cursor = referrals_collection.find({"referralId": referral_id})
-    referrals = [fix_id(ref) async for ref in referrals_cursor]
-    return referrals
+async def get_referrals_by_referral_id(
+    referral_id: str,
+    limit: int = limit_query(),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    referrals = await referrals_collection.find(
+        keyset_filter({"referralId": referral_id}, cursor)
+    ).sort(SORT).limit(limit + 1).to_list(length=limit + 1)
+    return BSONJSONResponse(page(referrals, limit))
 
 
 @router.patch("/referrals/{referral_id}/status")
 async def update_referral_status(referral_id: str, update: StatusUpdate):
-    result = await referrals_collection.update_one(
-        {"_id": referral_id},
-        {"$set": {"status": update.status}}
+    new_status = _normalize_status(update.status)
+    if new_status not in ALLOWED_REFERRAL_STATUSES:
+        allowed = ", ".join(sorted(ALLOWED_REFERRAL_STATUSES))
+        raise HTTPException(status_code=400, detail=f"Invalid status. Allowed values: {allowed}")
+
+    previous = await referrals_collection.find_one_and_update(
+        {"_id": referral_id, "status": {"$ne": new_status}},
+        {"$set": {"status": new_status}},
+        projection={"status": 1},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if result.modified_count == 0:
+    if not previous:
         raise HTTPException(status_code=404, detail="Referral not found or already up to date")
 
+    await record_referral_status_change(previous.get("status"), new_status)
+
     return {"message": "Referral status updated successfully"}
 
 
+@router.patch("/bulk/referrals/status")
+async def bulk_update_referral_status(body: BulkStatusUpdate):
+    """
+    Set the status of many referrals in one bulk_write. Current statuses are
+    read first so each ID can report whether it matched and whether it
+    changed, and so the status counters move by the right amounts. Each
+    write only applies if the status is still the one read; when another
+    writer got in between, the affected IDs are read again.
+    """
+    new_status = _normalize_status(body.status)
+    if new_status not in ALLOWED_REFERRAL_STATUSES:
+        allowed = ", ".join(sorted(ALLOWED_REFERRAL_STATUSES))
+        raise HTTPException(status_code=400, detail=f"Invalid status. Allowed values: {allowed}")
+    ids = unique_ids(body.ids)
+
+    current = {
+        doc["_id"]: doc.get("status")
+        async for doc in referrals_collection.find({"_id": {"$in": ids}}, {"status": 1})
+    }
+    changes = {_id: old for _id, old in current.items() if old != new_status}
+    if changes:
+        result = await referrals_collection.bulk_write([
+            UpdateOne({"_id": _id, "status": old}, {"$set": {"status": new_status}})
+            for _id, old in changes.items()
+        ], ordered=False)
+        if result.modified_count != len(changes):
+            # Some guards no longer matched; keep only the referrals that now
+            # carry the new status.
+            applied = {
+                doc["_id"]
+                async for doc in referrals_collection.find(
+                    {"_id": {"$in": list(changes)}, "status": new_status}, {"_id": 1}
+                )
+            }
+            changes = {_id: old for _id, old in changes.items() if _id in applied}
+        await record_referral_status_changes([(old, new_status) for old in changes.values()])
+
+    return {
+        "status": new_status,
+        "matched": len(current),
+        "modified": len(changes),
+        "results": [
+            {"id": _id, "matched": _id in current, "modified": _id in changes}
+            for _id in ids
+        ],
+    }
+
+
+@router.post("/bulk/users/delete")
+async def bulk_delete_users(body: BulkIds):
+    ids = unique_ids(body.ids)
+
+    emails = {
+        doc["_id"]: doc.get("email")
+        async for doc in users_collection.find({"_id": {"$in": ids}}, {"email": 1})
+    }
+    deleted = set(emails)
+    if emails:
+        result = await users_collection.bulk_write([DeleteOne({"_id": _id}) for _id in emails], ordered=False)
+        for email in emails.values():
+            invalidate_user(email)
+        if result.deleted_count != len(emails):
+            # Another writer deleted some of them first.
+            remaining = {
+                doc["_id"]
+                async for doc in users_collection.find({"_id": {"$in": list(emails)}}, {"_id": 1})
+            }
+            deleted -= remaining
+        deleted_count = result.deleted_count
+    else:
+        deleted_count = 0
+
+    return {
+        "matched": len(emails),
+        "deleted": deleted_count,
+        "results": [
+            {"id": _id, "matched": _id in emails, "deleted": _id in deleted}
+            for _id in ids
+        ],
+    }
+
+
+@router.patch("/bulk/users")
+async def bulk_update_users(body: AdminUserBulkUpdate):
+    """Apply name/contact number updates to many users in one bulk_write."""
+    updates = {}
+    for item in body.updates:
+        fields = {}
+        if isinstance(item.name, str):
+            fields["name"] = item.name.strip()
+        if isinstance(item.contactnumber, str):
+            fields["contactnumber"] = item.contactnumber.strip()
+        if fields:
+            updates.setdefault(item.id, {}).update(fields)
+    if body.updates and not updates:
+        raise HTTPException(status_code=400, detail="No updatable fields provided (name, contactnumber).")
+    ids = unique_ids(updates)
+
+    current = {
+        doc["_id"]: doc
+        async for doc in users_collection.find(
+            {"_id": {"$in": ids}}, {"name": 1, "contactnumber": 1, "email": 1, "referralId": 1}
+        )
+    }
+    changed = {
+        _id: fields for _id, fields in updates.items()
+        if _id in current and any(current[_id].get(k) != v for k, v in fields.items())
+    }
+    if changed:
+        result = await users_collection.bulk_write([
+            UpdateOne({"_id": _id}, {"$set": fields}) for _id, fields in changed.items()
+        ], ordered=False)
+        if result.matched_count != len(changed):
+            # Some users were deleted between the read and the write.
+            remaining = {
+                doc["_id"]
+                async for doc in users_collection.find({"_id": {"$in": list(changed)}}, {"_id": 1})
+            }
+            current = {_id: doc for _id, doc in current.items() if _id not in changed or _id in remaining}
+            changed = {_id: fields for _id, fields in changed.items() if _id in remaining}
+        for _id in changed:
+            invalidate_user(current[_id].get("email"))
+        await sync_referrer_names({
+            current[_id].get("referralId"): fields["name"]
+            for _id, fields in changed.items()
+            if "name" in fields and fields["name"] != current[_id].get("name")
+        })
+
+    return {
+        "matched": len([_id for _id in ids if _id in current]),
+        "modified": len(changed),
+        "results": [
+            {"id": _id, "matched": _id in current, "modified": _id in changed}
+            for _id in ids
+        ],
+    }
+
+
 @router.get("/referrals")
-async def list_referrals(status: Optional[str] = Query(
-    None,
-    description="Filter by status: Pending | Approved | Rejected"
-)):
+async def list_referrals(
+    status: Optional[str] = Query(
+        None,
+        description="Filter by status: Pending | Approved | Rejected"
+    ),
+    limit: int = limit_query(),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
     query = {}
     if status is not None:
         norm = _normalize_status(status)
@@ -88,48 +280,47 @@ async def list_referrals(status: Optional[str] = Query(
             raise HTTPException(status_code=400, detail=f"Invalid status. Allowed values: {allowed}")
         query["status"] = norm
 
-    pipeline = [
-        {"$match": query},
-        {"$sort": {"created_at": -1, "_id": -1}},
-        {
-            "$lookup": {
-                "from": users_collection.name,
-                "localField": "referralId",
-                "foreignField": "referralId",
-                "as": "referrer"
-            }
-        },
-        {"$unwind": {"path": "$referrer", "preserveNullAndEmptyArrays": True}},
-        {
-        "$set": {
-            "referrerName": "$referrer.name",
-            "referrerEmail": "$referrer.email",
-            }
-        },
-        {"$unset": "referrer"},
-    ]
-
-    cursor = referrals_collection.aggregate(pipeline)
-    items = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        items.append(doc)
-
-    return items
+    items = await referrals_collection.find(
+        keyset_filter(query, cursor)
+    ).sort(SORT).limit(limit + 1).to_list(length=limit + 1)
+    return BSONJSONResponse(page(items, limit))
 
 
 @router.get("/customer-applications/{userId}")
-async def get_customer_applications(userId: str):
+async def get_customer_applications(
+    userId: str,
+    limit: int = limit_query(),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
     if not userId:
         raise HTTPException(status_code=401, detail='User not found or authorized')
     
-    applications = await mortgage_applications_collection.find({"user_id": userId}).to_list(length=None)
-    if not applications:
+    applications = await mortgage_applications_collection.find(
+        keyset_filter({"user_id": userId}, cursor)
+    ).sort(SORT).limit(limit + 1).to_list(length=limit + 1)
+    if not applications and not cursor:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    for doc in applications:
-        doc["_id"] = str(doc["_id"])
+    return BSONJSONResponse(page(applications, limit))
+
     
-    return applications
 
-    
\ No newline at end of file
+
+@router.get("/customer-applications/{application_id}/bundle.zip")
+async def download_application_bundle(application_id: str):
+    """Stream a ZIP of every document on an application."""
+    if not ObjectId.is_valid(application_id):
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    application = await mortgage_applications_collection.find_one(
+        {"_id": ObjectId(application_id)}, {"customerId": 1, "storage": 1, "uploaded_files": 1}
+    )
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    filename = f"{application.get('customerId') or application_id}.zip"
+    return StreamingResponse(
+        stream_bundle(storage_for(application), application.get("uploaded_files") or {}),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
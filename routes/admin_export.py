@@ -0,0 +1,124 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from config.database import users_collection, referrals_collection, mortgage_applications_collection
+from models.user_models import _normalize_status, ALLOWED_REFERRAL_STATUSES
+from schemas.user_auth import requires_roles
+from schemas.responses import dumps_bson
+from datetime import datetime
+from typing import Optional
+import csv
+import io
+import os
+
+
+router = APIRouter(
+    prefix="/admin/export",
+    dependencies=[Depends(requires_roles(["admin"]))]
+    )
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+# collection name -> (collection, projection, CSV columns)
+EXPORTS = {
+    "users": (
+        users_collection,
+        {"password": 0},
+        ["_id", "name", "email", "contactnumber", "referralId", "roles", "created_at"],
+    ),
+    "referrals": (
+        referrals_collection,
+        None,
+        ["_id", "referralId", "referrerName", "referrerEmail", "firstName", "lastName",
+         "referralEmail", "referralPhone", "purpose", "comment", "status", "created_at"],
+    ),
+    "applications": (
+        mortgage_applications_collection,
+        None,
+        ["_id", "customerId", "user_id", "submitted_by", "status", "created_at", "updated_at",
+         "form_data", "uploaded_files"],
+    ),
+}
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return dumps_bson(value).decode()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def build_export_filter(collection: str, role, status, referral_id, user_id) -> dict:
+    """The same filters the matching admin list endpoints accept."""
+    query = {}
+    if collection == "users" and role:
+        query["roles"] = role
+    if collection == "referrals":
+        if status is not None:
+            norm = _normalize_status(status)
+            if norm not in ALLOWED_REFERRAL_STATUSES:
+                allowed = ", ".join(sorted(ALLOWED_REFERRAL_STATUSES))
+                raise HTTPException(status_code=400, detail=f"Invalid status. Allowed values: {allowed}")
+            query["status"] = norm
+        if referral_id:
+            query["referralId"] = referral_id
+    if collection == "applications" and user_id:
+        query["user_id"] = user_id
+    return query
+
+
+async def stream_ndjson(cursor):
+    lines = []
+    async for doc in cursor:
+        lines.append(dumps_bson(doc))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def stream_csv(cursor, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    rows = 0
+    async for doc in cursor:
+        writer.writerow([_csv_value(doc.get(column)) for column in columns])
+        rows += 1
+        if rows >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if rows:
+        yield buffer.getvalue()
+
+
+@router.get("/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson | csv"),
+    role: Optional[str] = Query(None, description="users: filter by role"),
+    status: Optional[str] = Query(None, description="referrals: Pending | Approved | Rejected"),
+    referral_id: Optional[str] = Query(None, description="referrals: filter by referrer referralId"),
+    user_id: Optional[str] = Query(None, description="applications: filter by user_id"),
+):
+    if collection not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown collection. Allowed values: {', '.join(EXPORTS)}")
+
+    source, projection, columns = EXPORTS[collection]
+    query = build_export_filter(collection, role, status, referral_id, user_id)
+    cursor = source.find(query, projection, batch_size=EXPORT_BATCH_SIZE)
+
+    filename = f"{collection}-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "csv":
+        return StreamingResponse(stream_csv(cursor, columns), media_type="text/csv", headers=headers)
+    return StreamingResponse(stream_ndjson(cursor), media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from bson import ObjectId
+from routes.user_auth import get_current_user
+from models.user_models import UserInDB
+from config.database import mortgage_applications_collection
+from schemas.storage import storage_for
+import asyncio
+import os
+
+router = APIRouter()
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+@router.get("/documents/{application_id}/{key}")
+async def get_document(
+    application_id: str,
+    key: str,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """
+    Stream one uploaded document to its owner or an admin. Supports Range
+    requests and If-None-Match; Drive documents are served from a local
+    cache after the first download.
+    """
+    if not ObjectId.is_valid(application_id) or not key.replace("_", "").isalnum():
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    query = {"_id": ObjectId(application_id)}
+    if "admin" not in [role.lower() for role in current_user.roles or []]:
+        query["submitted_by"] = current_user.email
+    application = await mortgage_applications_collection.find_one(
+        query, {"customerId": 1, "storage": 1, f"uploaded_files.{key}": 1}
+    )
+    file_info = (application or {}).get("uploaded_files", {}).get(key)
+    if not file_info:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    storage = storage_for(application)
+    etag = storage.etag(file_info)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = await storage.local_path(file_info)
+        stat_result = await asyncio.get_running_loop().run_in_executor(None, os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Document not found")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Could not fetch document: {str(e)}")
+
+    return FileResponse(
+        path,
+        stat_result=stat_result,
+        media_type=storage.content_type(file_info),
+        filename=file_info.get("file_name"),
+        content_disposition_type="inline",
+        headers=headers,
+    )
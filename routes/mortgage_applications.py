@@ -1,30 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from routes.user_auth import get_current_user
 from models.user_models import UserInDB
 from datetime import datetime
 from config.database import mortgage_applications_collection
 from bson import ObjectId
 from uuid import uuid4
-from schemas.gdrive_upload import get_drive_service, get_root_folder
+from schemas.counters import record_application
+from schemas.responses import BSONJSONResponse
+from schemas.storage import storage_for
 
 router = APIRouter()
+
+# Fields returned by the application listing unless the full documents are
+# requested; form_data and uploaded_files are fetched per application instead.
+APPLICATION_SUMMARY_PROJECTION = {
+    "customerId": 1,
+    "status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "form_data.customerName": 1,
+    "form_data.customerEmail": 1,
+    "form_data.customerPhone": 1,
+}
     
 
 @router.get("/user/mortgage-applications")
-async def get_user_mortgage_applications(current_user: UserInDB = Depends(get_current_user)):
+async def get_user_mortgage_applications(
+    view: str = Query("summary", pattern="^(summary|full)$", description="summary | full"),
+    current_user: UserInDB = Depends(get_current_user),
+):
     try:
+        projection = APPLICATION_SUMMARY_PROJECTION if view == "summary" else None
         applications = await mortgage_applications_collection.find(
+            {"submitted_by": current_user.email},
+            projection,
         ).sort("created_at", -1).to_list(length=100)
         
-        for app in applications:
-            app["_id"] = str(app["_id"])
-        
-        return applications
+        return BSONJSONResponse(applications)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching applications: {str(e)}")
 
 
+@router.get("/user/mortgage-applications/{application_id}")
+async def get_user_mortgage_application(
+    application_id: str,
+    current_user: UserInDB = Depends(get_current_user),
+):
+    if not ObjectId.is_valid(application_id):
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    application = await mortgage_applications_collection.find_one(
+        {"_id": ObjectId(application_id), "submitted_by": current_user.email}
+    )
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    return BSONJSONResponse(application)
+
+
 @router.delete("/user/mortgage-application/{application_id}")
 async def delete_mortgage_application(
     application_id: str,
@@ -39,24 +73,15 @@ async def delete_mortgage_application(
             raise HTTPException(status_code=404, detail="Application not found")
 
         customer_id = application.get("customerId")
-        drive_service = get_drive_service()
+        storage = storage_for(application)
 
         try:
-            root_folder_id = get_root_folder(drive_service)
-            folder_list = drive_service.files().list(
-                q=f"name='{customer_id}' and '{root_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
-                fields="files(id, name)"
-            ).execute().get("files", [])
-
-            if folder_list:
-                folder_id = folder_list[0]["id"]
-                drive_service.files().update(
-                    fileId=folder_id,
-                    body={"trashed": True}
-                ).execute()
+            folder_id = await storage.find_folder(application)
+            if folder_id:
+                await storage.trash_folder(folder_id)
                 print(f"🗑️ Moved customer folder '{customer_id}' (and its contents) to Trash.")
             else:
-                print(f"⚠️ Folder '{customer_id}' not found in Drive.")
+                print(f"⚠️ Folder '{customer_id}' not found in {storage.name} storage.")
 
         except Exception as e:
             print(f"⚠️ Could not move folder '{customer_id}' to Trash: {e}")
@@ -66,6 +91,7 @@ async def delete_mortgage_application(
         )
 
         if result.deleted_count == 1:
+            await record_application(application, -1)
             return {"message": "Application deleted successfully and folder moved to Trash."}
         else:
             raise HTTPException(status_code=500, detail="Failed to delete application")
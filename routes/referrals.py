@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Body, status
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from typing import List
 from models.user_models import User
 from models.referral_models import ReferralCreate
 from config.database import referrals_collection
@@ -7,42 +10,128 @@ from schemas.user_auth import requires_roles
 from datetime import datetime, timedelta
 from bson import ObjectId
 from schemas.send_emails import send_referral_email
+from schemas.counters import record_referral, record_referrals
+from schemas.referrals import load_referrer, reconcile_referrer_fields
+from schemas.responses import BSONJSONResponse
 
 router = APIRouter()
 
+MAX_BULK_REFERRALS = 500
+
+
+async def current_referrer(current_user: User) -> dict:
+    referrer = await load_referrer(current_user.userId)
+    if not referrer:
+        raise HTTPException(status_code=401, detail="User not found")
+    return referrer
+
+
+def build_referral_document(referral: ReferralCreate, referrer: dict, created_at: datetime) -> dict:
+    referral_data = referral.dict()
+    referral_data.update({
+        "_id": str(uuid4()),
+        "referralId": referrer.get("referralId"),
+        "referrerName": referrer.get("name"),
+        "referrerEmail": referrer.get("email"),
+        "created_at": created_at,
+        "status": "Pending",
+    })
+    return referral_data
+
+
 @router.post("/submit-referral")
 async def submit_referral(
     referral: ReferralCreate,
     current_user: User = Depends(requires_roles(["user"]))
 ):
+    referrer = await current_referrer(current_user)
     try:
-        referral_data = referral.dict()
-        referral_data.update({
-            "_id": str(uuid4()),
-            "referralId": current_user.referralId,
-            "created_at": datetime.utcnow(),
-            "status": "Pending",
-        })
+        referral_data = build_referral_document(referral, referrer, datetime.utcnow())
 
         await referrals_collection.insert_one(referral_data)
+        await reconcile_referrer_fields(referrer, [referral_data["_id"]])
+        await record_referral(referral_data)
 
         send_referral_email(
             to_email=referral.referralEmail,
-            referrer_email=current_user.email,
-            referral_id=current_user.referralId
+            referrer_email=referrer.get("email"),
+            referral_id=referrer.get("referralId")
         )
         return {"message": "Referral submitted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 
+@router.post("/submit-referrals/bulk")
+async def submit_referrals_bulk(
+    items: List[dict] = Body(..., description="A list of referrals, each shaped like ReferralCreate"),
+    current_user: User = Depends(requires_roles(["user"]))
+):
+    """
+    Submit many referrals at once. Each item is validated on its own, valid
+    ones are written with a single unordered insert_many, and the referral
+    emails are queued on the outbox. Returns one result per item, in order.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="No referrals provided.")
+    if len(items) > MAX_BULK_REFERRALS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_REFERRALS} referrals per request.")
+
+    referrer = await current_referrer(current_user)
+    results = [None] * len(items)
+    documents, positions = [], []
+    created_at = datetime.utcnow()
+    for index, item in enumerate(items):
+        try:
+            referral = ReferralCreate.model_validate(item)
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status": "invalid",
+                "errors": e.errors(include_url=False, include_context=False),
+            }
+            continue
+        documents.append(build_referral_document(referral, referrer, created_at))
+        positions.append(index)
+
+    write_errors = {}
+    if documents:
+        try:
+            await referrals_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            write_errors = {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+    inserted = []
+    for document_index, (index, document) in enumerate(zip(positions, documents)):
+        if document_index in write_errors:
+            results[index] = {"index": index, "status": "failed", "error": write_errors[document_index]}
+            continue
+        inserted.append(document)
+        results[index] = {"index": index, "status": "created", "id": document["_id"]}
+        send_referral_email(
+            to_email=document["referralEmail"],
+            referrer_email=referrer.get("email"),
+            referral_id=referrer.get("referralId")
+        )
+
+    await reconcile_referrer_fields(referrer, [document["_id"] for document in inserted])
+    await record_referrals(inserted)
+    return {
+        "created": len(inserted),
+        "failed": len(items) - len(inserted),
+        "results": results,
+    }
+
+
 @router.get("/my-referrals")
 async def get_my_referrals(
     current_user: User = Depends(requires_roles(["user"]))
 ):
     try:
         referrals = await referrals_collection.find({"referralId": current_user.referralId}).to_list(length=None)
-        return referrals
+        return BSONJSONResponse(referrals)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching referrals: {str(e)}")
 
@@ -50,11 +139,16 @@ async def get_my_referrals(
 @router.delete('/delete-referral/{id}')
 async def delete_referral_by_id(id: str, current_user: User = Depends(requires_roles(["user"]))):
     try:
-        referral = await referrals_collection.delete_one({"_id": id, "referralId": current_user.referralId})
+        referral = await referrals_collection.find_one_and_delete(
+            {"_id": id, "referralId": current_user.referralId},
+            projection={"status": 1, "referralId": 1, "created_at": 1},
+        )
 
-        if referral.deleted_count == 0:
+        if not referral:
             raise HTTPException(status_code=404, detail="Referral not found or unauthorized")
 
+        await record_referral(referral, -1)
+
         return {"message": "Referral deleted successfully."}
 
     except HTTPException:
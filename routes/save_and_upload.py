@@ -6,7 +6,10 @@ from datetime import datetime
 from config.database import mortgage_applications_collection
 from schemas.user_auth import get_current_user
 from models.user_models import User
-from schemas.gdrive_upload import get_drive_service, get_customer_folder, get_root_folder, upload_file_to_drive
+from schemas.storage import get_storage, storage_for
+from schemas.counters import record_application
+from schemas.responses import BSONJSONResponse
+from pymongo import ReturnDocument
 from bson import ObjectId
 import json
 
@@ -34,27 +37,32 @@ async def submit_mortgage_with_docs(
 
         customerId = str(uuid4())
 
-        drive = get_drive_service()
-        root_folder_id = get_root_folder(drive)
-        customer_folder_id = get_customer_folder(drive, root_folder_id, customerId)
+        storage = get_storage()
+        customer_folder_id = await storage.create_folder(customerId)
 
-        uploaded_files = {}
-        for key, file in {"id_proof": id_proof, "address_proof": address_proof, "bank_statement": bank_statement, "payslip": payslip}.items():
-            if file:
-                uploaded_files[key] = await upload_file_to_drive(drive, customer_folder_id, file)
+        uploaded_files = await storage.put_many(customer_folder_id, {
+            "id_proof": id_proof,
+            "address_proof": address_proof,
+            "bank_statement": bank_statement,
+            "payslip": payslip,
+        })
 
         mongo_form_data = {k: v for k, v in form_dict.items() if not hasattr(v, "filename")}
         application_data = {
             "customerId": customerId,
+            "storage": storage.name,
+            "storage_folder_id": customer_folder_id,
             "submitted_by": current_user.email,
             "uploaded_files": uploaded_files,
             "form_data": mongo_form_data,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
-            "status": "submitted"
+            "status": "submitted",
+            "version": 1,
         }
 
         result = await mortgage_applications_collection.insert_one(application_data)
+        await record_application(application_data)
 
         return {
             "message": "Mortgage application submitted successfully",
@@ -67,62 +75,152 @@ async def submit_mortgage_with_docs(
         raise HTTPException(status_code=500, detail=f"Error submitting application: {str(e)}")
 
 
+def _field_name(name) -> bool:
+    """Form fields and file keys become dotted $set paths, so keep them plain."""
+    return isinstance(name, str) and name.replace("_", "").isalnum()
+
+
+def _version_filter(version: int) -> dict:
+    # Applications created before versioning count as version 1.
+    return {"version": {"$in": [1, None]}} if version == 1 else {"version": version}
+
+
 @router.put("/update-mortgage-with-docs/{application_id}")
 async def update_mortgage_with_docs(
     application_id: str,
-    form_data: str = Form(...),
+    form_data: str = Form("{}"),
     files: List[UploadFile] = File([]),
     file_keys: List[str] = Form([]),
+    version: int | None = Form(None),
     current_user: User=Depends(get_current_user)
 ):
+    """
+    Partially update an application. `form_data` holds only the changed
+    fields, and each file replaces the document under the matching
+    `file_keys` entry. Send the `version` the edit was based on to get a 409
+    instead of overwriting someone else's changes.
+    """
     try:
-        data = json.loads(form_data)
-
-        # Step 1: Update form data
-        await mortgage_applications_collection.update_one(
-            {"_id": ObjectId(application_id)},
-            {"$set": {"form_data": data, "updated_at": datetime.utcnow()}}
-        )
-
-        # Step 2: Handle file updates
+        if not ObjectId.is_valid(application_id):
+            raise HTTPException(status_code=404, detail="Application not found")
+        try:
+            data = json.loads(form_data)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="form_data must be a JSON object")
+        if not isinstance(data, dict) or not all(_field_name(field) for field in data):
+            raise HTTPException(status_code=400, detail="form_data must be a JSON object of plain field names")
+        if (
+            len(files) != len(file_keys)
+            or len(set(file_keys)) != len(file_keys)
+            or not all(_field_name(key) for key in file_keys)
+        ):
+            raise HTTPException(status_code=400, detail="Each file needs its own matching plain file key")
+
+        # Applicants may only edit their own applications; admins any of them.
+        scope = {"_id": ObjectId(application_id)}
+        if "admin" not in [role.lower() for role in current_user.roles or []]:
+            scope["submitted_by"] = current_user.email
+        query = dict(scope)
+        if version is not None:
+            query.update(_version_filter(version))
+        update_fields = {f"form_data.{field}": value for field, value in data.items()}
+
+        # Store new files concurrently before the update, so the file metadata
+        # is committed together with the form fields. A file that fails to
+        # upload is reported and leaves its current document in place.
+        outcomes, stored_files, replaced, storage = {}, {}, {}, None
         if files:
-            app_doc = await mortgage_applications_collection.find_one({"_id": ObjectId(application_id)})
-            customer_id = app_doc["customerId"]
-
-            drive_service = get_drive_service()
-            root_folder_id = get_root_folder(drive_service)
-            customer_folder_id = get_customer_folder(drive_service, root_folder_id, customer_id)
-
-            uploaded_files = app_doc.get("uploaded_files", {})
-
-            for file, key in zip(files, file_keys):
-                # Step 2A: Move old file to Trash (if it exists)
-                old_file_info = uploaded_files.get(key)
-                if old_file_info and "google_drive_id" in old_file_info:
-                    try:
-                        drive_service.files().update(
-                            fileId=old_file_info["google_drive_id"],
-                            body={"trashed": True}
-                        ).execute()
-                        print(f"🗑️ Moved old file '{old_file_info['file_name']}' to Trash.")
-                    except Exception as trash_err:
-                        print(f"⚠️ Could not move old file to Trash: {trash_err}")
-
-                # Step 2B: Upload new file directly to Drive
-                uploaded_file_info = await upload_file_to_drive(drive_service, customer_folder_id, file)
-                uploaded_files[key] = uploaded_file_info
-
-            # Step 3: Update DB
-            await mortgage_applications_collection.update_one(
-                {"_id": ObjectId(application_id)},
-                {"$set": {"uploaded_files": uploaded_files}}
-            )
-
-        return JSONResponse({
-            "status": "success",
-            "message": "Application updated successfully! Old files moved to Trash."
+            app_doc = await mortgage_applications_collection.find_one(query)
+            if not app_doc:
+                raise _update_error(await _current_application(scope))
+
+            storage = storage_for(app_doc)
+            customer_folder_id = await storage.folder_for(app_doc)
+            old_files = app_doc.get("uploaded_files") or {}
+            results = await storage.put_many(customer_folder_id, dict(zip(file_keys, files)), return_exceptions=True)
+            for key, result in results.items():
+                if isinstance(result, Exception):
+                    outcomes[key] = {"status": "failed", "error": str(result)}
+                    continue
+                stored_files[key] = result
+                update_fields[f"uploaded_files.{key}"] = result
+                old_info = old_files.get(key)
+                if old_info and not storage.same_file(old_info, result):
+                    replaced[key] = old_info
+                outcomes[key] = {"status": "replaced" if old_info else "added", "file": result}
+            update_fields["storage_folder_id"] = customer_folder_id
+
+        update_fields["updated_at"] = datetime.utcnow()
+        # A pipeline update, so that applications without a version (counted
+        # as 1) move to 2 rather than $inc creating version 1 again. Values
+        # are wrapped in $literal so user input is never read as an expression.
+        application = await mortgage_applications_collection.find_one_and_update(
+            query,
+            [{"$set": {
+                **{field: {"$literal": value} for field, value in update_fields.items()},
+                "version": {"$add": [{"$ifNull": ["$version", 1]}, 1]},
+            }}],
+            return_document=ReturnDocument.AFTER,
+        )
+        if not application:
+            current = await _current_application(scope)
+            # Nothing points at the new files, unless one is identical to a
+            # document the application still has; trash the rest.
+            if stored_files:
+                await storage.trash_many(storage.unreferenced(
+                    list(stored_files.values()), (current or {}).get("uploaded_files")
+                ))
+            raise _update_error(current)
+
+        # Only now that the application points at the new files are the old
+        # ones moved to Trash, all in one batch where the backend supports it.
+        # An old file another document slot still uses stays where it is.
+        if replaced:
+            live_files = application.get("uploaded_files")
+            trash_keys = []
+            for key, old_info in replaced.items():
+                if storage.unreferenced([old_info], live_files):
+                    trash_keys.append(key)
+                else:
+                    outcomes[key].update(old_file_trashed=False, old_file_in_use=True)
+            errors = await storage.trash_many([replaced[key] for key in trash_keys])
+            for key, error in zip(trash_keys, errors):
+                outcomes[key]["old_file_trashed"] = error is None
+                if error is not None:
+                    print(f"⚠️ Could not move old file '{replaced[key].get('file_name')}' to Trash: {error}")
+
+        failed = [key for key, outcome in outcomes.items() if outcome["status"] == "failed"]
+        return BSONJSONResponse({
+            "status": "partial" if failed else "success",
+            "message": (
+                f"Application updated, but {len(failed)} file(s) could not be uploaded: {', '.join(failed)}."
+                if failed else "Application updated successfully! Old files moved to Trash."
+            ),
+            "files": outcomes,
+            "application": application,
         })
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error updating mortgage: {e}")
-        return JSONResponse({"status": "error", "message": str(e)})
\ No newline at end of file
+        return JSONResponse({"status": "error", "message": str(e)})
+
+
+async def _current_application(scope: dict) -> dict | None:
+    """The application as the caller may see it, or None."""
+    return await mortgage_applications_collection.find_one(scope, {"version": 1, "uploaded_files": 1})
+
+
+def _update_error(current: dict | None) -> HTTPException:
+    """The error for an update whose filter matched nothing."""
+    if not current:
+        return HTTPException(status_code=404, detail="Application not found")
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Application was changed by someone else; reload and try again.",
+            "version": current.get("version", 1),
+        },
+    )
+
@@ -4,7 +4,6 @@ from models.user_models import Token, RefreshTokenRequest
 from schemas.user_auth import *
 from config.database import users_collection
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import JWTError
 
 router = APIRouter(tags=["Authentication"])
 
@@ -78,5 +77,5 @@ async def refresh_access_token(request: RefreshTokenRequest):
             roles=user["roles"]
         )
 
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
\ No newline at end of file
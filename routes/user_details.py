@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from schemas.user_auth import get_current_user
 from models.user_models import User, PasswordResetRequest, ResetPasswordRequest, UserInDB, ProfileUpdate
-from schemas.user_auth import create_access_token, hash_password, get_user
+from schemas.user_auth import create_access_token, hash_password_async, get_user, invalidate_user
 from config.database import users_collection, SECRET_KEY, ALGORITHM
 from typing import Annotated
+from schemas.referrals import sync_referrer_fields
 from schemas.send_emails import send_email, RESET_TOKEN_EXPIRE_MINUTES
 from datetime import timedelta
-from jose import JWTError, jwt
+from jwt.exceptions import InvalidTokenError
+import jwt
 
 
 router = APIRouter(prefix="/user")
@@ -43,7 +45,10 @@ async def update_user_me(
 
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
+    invalidate_user(current_user.email)
+    if "name" in updates:
+        await sync_referrer_fields(current_user.referralId, name=updates["name"])
     updated_user = await get_user(current_user.email)
     return updated_user
 
@@ -78,15 +83,16 @@ async def reset_password(data: ResetPasswordRequest):
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        hashed_password = hash_password(data.new_password)
+        hashed_password = await hash_password_async(data.new_password)
         await users_collection.update_one(
             {"email": email},
             {"$set": {"password": hashed_password}}
         )
+        invalidate_user(email)
 
         return {"message": "Password reset successful."}
 
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token is invalid or expired"
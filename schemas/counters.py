@@ -0,0 +1,174 @@
+"""
+Dashboard counters, maintained incrementally.
+
+Each counter is one document in counters_collection:
+
+    {"_id": "referrals.status:Pending", "metric": "referrals.status", "key": "Pending", "count": 12}
+
+Write paths call the record_* helpers, which add up the changes per counter
+and $inc them all in a single unordered bulk_write. rebuild_counters()
+recomputes every counter from the source collections with one aggregation,
+to reconcile any drift.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from pymongo import UpdateOne, DeleteMany
+from config.database import counters_collection, referrals_collection, mortgage_applications_collection
+
+
+def _day(value) -> str | None:
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else None
+
+
+def _referral_counters(referral: dict) -> list[tuple[str, object]]:
+    return [
+        ("referrals.total", "all"),
+        ("referrals.status", referral.get("status")),
+        ("referrals.referrer", referral.get("referralId")),
+        ("referrals.day", _day(referral.get("created_at"))),
+    ]
+
+
+def _application_counters(application: dict) -> list[tuple[str, object]]:
+    return [
+        ("applications.total", "all"),
+        ("applications.status", application.get("status")),
+    ]
+
+
+def _inc_ops(deltas: Counter) -> list[UpdateOne]:
+    return [
+        UpdateOne(
+            {"_id": f"{metric}:{key}"},
+            {"$inc": {"count": delta}, "$setOnInsert": {"metric": metric, "key": key}},
+            upsert=True,
+        )
+        for (metric, key), delta in deltas.items()
+        if key is not None and delta != 0
+    ]
+
+
+async def apply_counter_deltas(deltas: Counter):
+    """$inc every counter in `deltas` ((metric, key) -> delta) in one bulk_write."""
+    ops = _inc_ops(deltas)
+    if ops:
+        await counters_collection.bulk_write(ops, ordered=False)
+
+
+async def record_referrals(referrals: list[dict], delta: int = 1):
+    """Count referrals in (delta=1) or out (delta=-1) of every counter they touch."""
+    deltas = Counter()
+    for referral in referrals:
+        for counter in _referral_counters(referral):
+            deltas[counter] += delta
+    await apply_counter_deltas(deltas)
+
+
+async def record_referral(referral: dict, delta: int = 1):
+    await record_referrals([referral], delta)
+
+
+async def record_referral_status_changes(changes: list[tuple[str | None, str | None]]):
+    """Move referrals between status counters; `changes` is (old, new) per referral."""
+    deltas = Counter()
+    for old_status, new_status in changes:
+        deltas[("referrals.status", old_status)] -= 1
+        deltas[("referrals.status", new_status)] += 1
+    await apply_counter_deltas(deltas)
+
+
+async def record_referral_status_change(old_status: str | None, new_status: str | None):
+    await record_referral_status_changes([(old_status, new_status)])
+
+
+async def record_application(application: dict, delta: int = 1):
+    deltas = Counter()
+    for counter in _application_counters(application):
+        deltas[counter] += delta
+    await apply_counter_deltas(deltas)
+
+
+async def read_stats(days: int = 30) -> dict:
+    """All counters grouped by metric; per-day counts are limited to the last `days` days."""
+    cutoff = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    cursor = counters_collection.find({
+        "$or": [
+            {"metric": {"$ne": "referrals.day"}},
+            {"metric": "referrals.day", "key": {"$gte": cutoff}},
+        ]
+    })
+
+    stats = {
+        "referrals": {"total": 0, "by_status": {}, "by_referrer": {}, "by_day": {}},
+        "applications": {"total": 0, "by_status": {}},
+    }
+    sections = {
+        "referrals.status": stats["referrals"]["by_status"],
+        "referrals.referrer": stats["referrals"]["by_referrer"],
+        "referrals.day": stats["referrals"]["by_day"],
+        "applications.status": stats["applications"]["by_status"],
+    }
+    async for counter in cursor:
+        metric = counter["metric"]
+        if metric == "referrals.total":
+            stats["referrals"]["total"] = counter["count"]
+        elif metric == "applications.total":
+            stats["applications"]["total"] = counter["count"]
+        elif metric in sections:
+            sections[metric][counter["key"]] = counter["count"]
+    return stats
+
+
+def _group(source: str, key) -> list:
+    return [
+        {"$match": {"source": source}},
+        {"$group": {"_id": key, "count": {"$sum": 1}}},
+    ]
+
+
+async def rebuild_counters() -> int:
+    """
+    Recompute every counter from referrals and mortgage applications with a
+    single aggregation, then overwrite the counters collection to match.
+    Returns the number of counters written.
+    """
+    pipeline = [
+        {"$project": {
+            "_id": 0,
+            "source": {"$literal": "referrals"},
+            "status": 1,
+            "referralId": 1,
+            "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at", "onNull": None}},
+        }},
+        {"$unionWith": {
+            "coll": mortgage_applications_collection.name,
+            "pipeline": [{"$project": {"_id": 0, "source": {"$literal": "applications"}, "status": 1}}],
+        }},
+        {"$facet": {
+            "referrals_total": _group("referrals", "all"),
+            "referrals_status": _group("referrals", "$status"),
+            "referrals_referrer": _group("referrals", "$referralId"),
+            "referrals_day": _group("referrals", "$day"),
+            "applications_total": _group("applications", "all"),
+            "applications_status": _group("applications", "$status"),
+        }},
+    ]
+    result = await referrals_collection.aggregate(pipeline).to_list(length=1)
+    facets = result[0] if result else {}
+
+    ops, ids = [], []
+    for facet, groups in facets.items():
+        metric = facet.replace("_", ".", 1)
+        for group in groups:
+            if group["_id"] is None:
+                continue
+            counter_id = f"{metric}:{group['_id']}"
+            ids.append(counter_id)
+            ops.append(UpdateOne(
+                {"_id": counter_id},
+                {"$set": {"metric": metric, "key": group["_id"], "count": group["count"]}},
+                upsert=True,
+            ))
+    ops.append(DeleteMany({"_id": {"$nin": ids}}))
+    await counters_collection.bulk_write(ops, ordered=False)
+    return len(ids)
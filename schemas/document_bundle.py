@@ -0,0 +1,89 @@
+"""
+Streaming ZIP bundles of an application's documents.
+
+All documents are fetched concurrently (at most BUNDLE_FETCH_CONCURRENCY at
+a time) through the application's storage backend; Drive documents land in
+the document cache. Each one is added to the archive as soon as it is ready,
+and the archive is written to a non-seekable sink that is drained after
+every chunk, so it is never held in memory or on disk as a whole. Producing
+a bundle takes roughly as long as fetching the largest document.
+
+Documents are mostly PDFs and images, which don't compress further, so
+entries are stored rather than deflated.
+"""
+import asyncio
+import os
+import time
+import zipfile
+from schemas.storage import StorageBackend
+
+BUNDLE_FETCH_CONCURRENCY = int(os.getenv("BUNDLE_FETCH_CONCURRENCY", "4"))
+_READ_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipSink:
+    """Write-only, non-seekable file for ZipFile; drain() hands back what was written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entry_name(key: str, file_info: dict) -> str:
+    file_name = (file_info.get("file_name") or "").replace("/", "_").replace("\\", "_")
+    return f"{key}_{file_name}" if file_name else key
+
+
+async def stream_bundle(storage: StorageBackend, uploaded_files: dict):
+    """Yield a ZIP archive of `uploaded_files` (key -> file info) chunk by chunk."""
+    semaphore = asyncio.Semaphore(BUNDLE_FETCH_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+
+    async def fetch(key, file_info):
+        # The file is opened as soon as it is fetched, so a cache eviction
+        # before it is archived can't pull it out from under us.
+        async with semaphore:
+            try:
+                return key, file_info, open(await storage.local_path(file_info), "rb"), None
+            except Exception as e:
+                return key, file_info, None, e
+
+    tasks = [asyncio.create_task(fetch(key, info)) for key, info in uploaded_files.items() if info]
+    sink = _ZipSink()
+    failures = []
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            for next_done in asyncio.as_completed(tasks):
+                key, file_info, source, error = await next_done
+                if error is not None:
+                    failures.append(f"{key}: {error}")
+                    continue
+
+                entry = zipfile.ZipInfo(_entry_name(key, file_info), date_time=time.localtime()[:6])
+                entry.file_size = os.fstat(source.fileno()).st_size
+                with source, archive.open(entry, "w") as target:
+                    while chunk := await loop.run_in_executor(None, source.read, _READ_CHUNK_SIZE):
+                        target.write(chunk)
+                        if data := sink.drain():
+                            yield data
+
+            if failures:
+                archive.writestr("ERRORS.txt", "Could not fetch:\n" + "\n".join(failures) + "\n")
+        yield sink.drain()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.result()[2] is not None:
+                task.result()[2].close()
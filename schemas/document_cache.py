@@ -0,0 +1,147 @@
+"""
+Size-bounded on-disk LRU cache for downloaded documents.
+
+Drive documents served by GET /documents are kept under DOCUMENT_CACHE_DIR,
+one file per Drive file ID, so repeat views during a review session are read
+from local disk. Drive never changes a stored file's content (replacing a
+document uploads a new file), so entries never go stale; once the cache
+holds more than DOCUMENT_CACHE_MAX_BYTES the least recently served files
+are deleted. Files served in the last DOCUMENT_CACHE_GRACE_SECONDS are never
+evicted, so a response that is still opening its file can't lose it; the
+cache may briefly exceed its budget instead.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from uuid import uuid4
+
+DOCUMENT_CACHE_DIR = os.getenv("DOCUMENT_CACHE_DIR", "document_cache")
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", str(1024 ** 3)))
+DOCUMENT_CACHE_GRACE_SECONDS = float(os.getenv("DOCUMENT_CACHE_GRACE_SECONDS", "10"))
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class DocumentCache:
+    """
+    The index (key -> size and last use, oldest first) is guarded by a
+    threading lock, and all disk I/O runs on the default executor, never on
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        directory: str = DOCUMENT_CACHE_DIR,
+        max_bytes: int = DOCUMENT_CACHE_MAX_BYTES,
+        grace_seconds: float = DOCUMENT_CACHE_GRACE_SECONDS,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._fetches: dict[str, asyncio.Lock] = {}
+
+    def _path(self, key: str) -> Path:
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return self.directory / key
+
+    def _load(self):
+        """Pick up files left by a previous process, oldest use first."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                path.unlink(missing_ok=True)
+            elif path.is_file():
+                stat = path.stat()
+                files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, key, size in sorted(files):
+            # Recency from before the restart only orders the entries.
+            self._entries[key] = (size, 0.0)
+            self._size += size
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+    def _touch(self, key: str) -> bool:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key not in self._entries:
+                return False
+            try:
+                # The mtime records recency across restarts.
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                self._size -= self._entries.pop(key)[0]
+                return False
+            self._entries[key] = (self._entries[key][0], time.monotonic())
+            self._entries.move_to_end(key)
+            return True
+
+    def _add(self, key: str, size: int):
+        with self._lock:
+            now = time.monotonic()
+            old = self._entries.pop(key, None)
+            self._size += size - (old[0] if old else 0)
+            self._entries[key] = (size, now)
+            while self._size > self.max_bytes and self._entries:
+                old_key, (old_size, last_used) = next(iter(self._entries.items()))
+                if now - last_used < self.grace_seconds:
+                    break
+                del self._entries[old_key]
+                self._size -= old_size
+                self._path(old_key).unlink(missing_ok=True)
+
+    def _store(self, tmp_path: Path, key: str):
+        size = tmp_path.stat().st_size
+        os.replace(tmp_path, self._path(key))
+        self._add(key, size)
+
+    async def get(self, key: str, fetch) -> Path:
+        """
+        Path of the cached file for `key`. On a miss, `await fetch(fd)` writes
+        the content into a binary file; concurrent misses for the same key
+        share a single fetch.
+        """
+        path = self._path(key)
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, self._touch, key):
+            return path
+
+        lock = self._fetches.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                if await loop.run_in_executor(None, self._touch, key):
+                    return path
+                await loop.run_in_executor(None, self._ensure_loaded)
+                tmp_path = self.directory / f".fetch-{uuid4().hex}"
+                fd = await loop.run_in_executor(None, open, tmp_path, "wb")
+                try:
+                    with fd:
+                        await fetch(fd)
+                    await loop.run_in_executor(None, self._store, tmp_path, key)
+                finally:
+                    await loop.run_in_executor(None, lambda: tmp_path.unlink(missing_ok=True))
+                return path
+        finally:
+            if self._fetches.get(key) is lock and not lock.locked():
+                del self._fetches[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"files": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+document_cache = DocumentCache()
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from dotenv import find_dotenv, load_dotenv
+from schemas.metrics import SMTP_LATENCY, SMTP_ERRORS, EMAIL_DROPPED
+
+dotenv_path = find_dotenv()
+load_dotenv(dotenv_path)
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.hostinger.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
+SMTP_USERNAME = os.getenv("email_address")
+SMTP_PASSWORD = os.getenv("email_password")
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+
+EMAIL_OUTBOX_MAX_SIZE = int(os.getenv("EMAIL_OUTBOX_MAX_SIZE", "10000"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "2"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "300"))
+
+
+class EmailOutbox:
+    """
+    In-process email outbox. Request handlers enqueue messages and return
+    immediately; a background task sends them in batches over one
+    authenticated SMTP session, reconnecting when the server drops it and
+    retrying failed messages with exponential backoff.
+
+    All SMTP work happens on a single dedicated thread, so the connection is
+    never shared between threads and never blocks the event loop. smtplib
+    (and ssl with it) is imported there on first send, not at app startup.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=EMAIL_OUTBOX_MAX_SIZE)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._smtp: "smtplib.SMTP | None" = None
+        self._worker: asyncio.Task | None = None
+        # Messages waiting out a retry delay, by their timer.
+        self._retries: dict[asyncio.TimerHandle, tuple[Message, int]] = {}
+
+    def enqueue(self, msg: Message, attempt: int = 1) -> bool:
+        """
+        Queue a message for delivery. Never blocks on SMTP. When the outbox
+        is full the message is logged and dropped rather than failing the
+        request that sent it; returns whether it was queued.
+        """
+        try:
+            self._queue.put_nowait((msg, attempt))
+            return True
+        except asyncio.QueueFull:
+            EMAIL_DROPPED.labels("outbox_full").inc()
+            print(f"Email outbox full ({self._queue.maxsize}); dropped email to {msg['To']}")
+            return False
+
+    async def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Flush what is queued, including messages waiting to be retried, for up
+        to `timeout` seconds, then close the session. Anything still unsent
+        is logged and counted.
+        """
+        if self._worker is None:
+            return
+        # Retry now rather than after the backoff delay.
+        for handle, (msg, attempt) in list(self._retries.items()):
+            handle.cancel()
+            del self._retries[handle]
+            self.enqueue(msg, attempt)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        unsent = self._queue.qsize() + len(self._retries)
+        if unsent:
+            EMAIL_DROPPED.labels("shutdown").inc(unsent)
+            print(f"Email outbox stopped with {unsent} message(s) unsent")
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._disconnect)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < EMAIL_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                failures = await loop.run_in_executor(
+                    self._executor, self._send_batch, [msg for msg, _ in batch]
+                )
+            except Exception as e:
+                failures = {index: e for index in range(len(batch))}
+
+            for index, error in failures.items():
+                msg, attempt = batch[index]
+                if attempt >= EMAIL_MAX_ATTEMPTS:
+                    EMAIL_DROPPED.labels("max_attempts").inc()
+                    print(f"Email to {msg['To']} dropped after {attempt} attempts: {error}")
+                    continue
+                delay = min(EMAIL_RETRY_MAX_SECONDS, EMAIL_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                self._schedule_retry(loop, delay, msg, attempt + 1)
+
+            for _ in batch:
+                self._queue.task_done()
+
+    def _schedule_retry(self, loop, delay, msg, attempt):
+        def requeue():
+            self._retries.pop(handle, None)
+            self.enqueue(msg, attempt)
+
+        handle = loop.call_later(delay, requeue)
+        self._retries[handle] = (msg, attempt)
+
+    def _connect(self) -> "smtplib.SMTP":
+        import smtplib
+
+        if SMTP_USE_SSL:
+            smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        else:
+            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        if SMTP_USERNAME and SMTP_PASSWORD:
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _session(self) -> "smtplib.SMTP":
+        """Return a live SMTP session, reconnecting if the server dropped it."""
+        import smtplib
+
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+        self._smtp = self._connect()
+        return self._smtp
+
+    def _send_batch(self, messages: list[Message]) -> dict[int, Exception]:
+        """Send a batch over the shared session; return failures by index."""
+        import smtplib
+
+        failures = {}
+        smtp = self._session()
+        for index, msg in enumerate(messages):
+            started = time.perf_counter()
+            try:
+                smtp.send_message(msg)
+                SMTP_LATENCY.observe(time.perf_counter() - started)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                SMTP_ERRORS.labels(type(e).__name__).inc()
+                # The session died mid-batch: fail this message and reconnect
+                # for the rest of the batch.
+                failures[index] = e
+                self._smtp = None
+                try:
+                    smtp = self._session()
+                except Exception as connect_error:
+                    for remaining in range(index + 1, len(messages)):
+                        failures[remaining] = connect_error
+                    break
+            except smtplib.SMTPException as e:
+                SMTP_ERRORS.labels(type(e).__name__).inc()
+                failures[index] = e
+                try:
+                    smtp.rset()
+                except Exception:
+                    pass
+        return failures
+
+
+outbox = EmailOutbox()
@@ -1,67 +1,382 @@
-import io
-import json
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from google.oauth2.credentials import Credentials
-
-def get_root_folder(service, root_name="AAI Financials Mortgage Customers"):
-    response = service.files().list(
+import os
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from schemas.metrics import DRIVE_LATENCY, DRIVE_ERRORS
+
+# The Google client libraries are slow to import and only three endpoints use
+# them, so they are imported inside the functions that need them.
+
+# Drive calls go through blocking httplib2 requests, so they run on a bounded
+# thread pool instead of the event loop. DRIVE_MAX_WORKERS caps concurrent
+# Drive requests for the whole process, DRIVE_UPLOADS_PER_REQUEST caps how many
+# files a single request uploads at once.
+DRIVE_MAX_WORKERS = int(os.getenv("DRIVE_MAX_WORKERS", "8"))
+DRIVE_UPLOADS_PER_REQUEST = int(os.getenv("DRIVE_UPLOADS_PER_REQUEST", "4"))
+
+# Uploads are streamed to Drive as resumable sessions, one chunk at a time, so
+# peak memory per upload is bounded by DRIVE_UPLOAD_CHUNK_SIZE. Drive requires
+# chunks to be a multiple of 256 KiB. A failed chunk is retried with backoff
+# and the session resumes from the last byte Drive acknowledged.
+_CHUNK_GRANULARITY = 256 * 1024
+DRIVE_UPLOAD_CHUNK_SIZE = max(
+    _CHUNK_GRANULARITY,
+    int(os.getenv("DRIVE_UPLOAD_CHUNK_SIZE", str(8 * _CHUNK_GRANULARITY))) // _CHUNK_GRANULARITY * _CHUNK_GRANULARITY,
+)
+DRIVE_UPLOAD_RETRIES = int(os.getenv("DRIVE_UPLOAD_RETRIES", "5"))
+_RETRY_BASE_SECONDS = 1.0
+_RETRY_MAX_SECONDS = 32.0
+
+# Drive accepts at most 100 calls in one batch request.
+DRIVE_BATCH_LIMIT = 100
+
+DRIVE_CREDENTIALS_FILE = os.getenv("DRIVE_CREDENTIALS_FILE", "credentials.json")
+DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive"]
+ROOT_FOLDER_NAME = "AAI Financials Mortgage Customers"
+
+_drive_executor = ThreadPoolExecutor(max_workers=DRIVE_MAX_WORKERS, thread_name_prefix="drive")
+_thread_local = threading.local()
+
+# One Drive client per process; credentials are loaded once and refreshed in
+# place when they expire. Root folder IDs never change, so they are cached too.
+_drive_service = None
+_service_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_root_folder_ids: dict[str, str] = {}
+
+
+def _thread_http(credentials):
+    """httplib2.Http is not thread-safe, so each worker thread keeps its own."""
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+
+    http = getattr(_thread_local, "http", None)
+    if http is None or http.credentials is not credentials:
+        http = AuthorizedHttp(credentials, http=httplib2.Http())
+        _thread_local.http = http
+    return http
+
+
+def _refresh_credentials(credentials):
+    """Refresh expired credentials once, rather than once per worker thread."""
+    if credentials.valid:
+        return
+    import httplib2
+    from google_auth_httplib2 import Request
+
+    with _refresh_lock:
+        if not credentials.valid:
+            credentials.refresh(Request(httplib2.Http()))
+
+
+def _timed(operation, call):
+    """Run a blocking Drive call, recording its latency and any error."""
+    started = time.perf_counter()
+    try:
+        return call()
+    except Exception:
+        DRIVE_ERRORS.labels(operation).inc()
+        raise
+    finally:
+        DRIVE_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+
+def _request_http(request):
+    """
+    The authorized Http this thread should send `request` with, or None for
+    clients without Google credentials (stand-ins installed with
+    set_drive_service), which then use their own.
+    """
+    credentials = getattr(request.http, "credentials", None)
+    if credentials is None:
+        return None
+    _refresh_credentials(credentials)
+    return _thread_http(credentials)
+
+
+def _execute_sync(request):
+    http = _request_http(request)
+    return _timed(request.methodId, lambda: request.execute(http=http))
+
+
+def _transient_upload_error(error) -> bool:
+    """Errors after which the resumable session can pick up where it stopped."""
+    if isinstance(error, OSError):
+        return True
+    try:
+        import httplib2
+        from googleapiclient.errors import HttpError
+    except ImportError:
+        return False
+    if isinstance(error, httplib2.HttpLib2Error):
+        return True
+    return isinstance(error, HttpError) and (error.resp.status == 429 or error.resp.status >= 500)
+
+
+def _upload_sync(request):
+    response = None
+    failures = 0
+    while response is None:
+        http = _request_http(request)
+        # num_retries only covers retryable HTTP responses; a dropped
+        # connection or timeout is raised straight away. Calling next_chunk
+        # again on the same request first asks Drive how many bytes it has,
+        # then resumes from there.
+        try:
+            _, response = _timed(
+                f"{request.methodId}.chunk",
+                lambda: request.next_chunk(http=http, num_retries=DRIVE_UPLOAD_RETRIES),
+            )
+            failures = 0
+        except Exception as e:
+            failures += 1
+            if failures > DRIVE_UPLOAD_RETRIES or not _transient_upload_error(e):
+                raise
+            # The connection may be unusable; give this thread a fresh one.
+            _thread_local.http = None
+            time.sleep(min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * 2 ** (failures - 1)) * random.uniform(0.5, 1.0))
+    return response
+
+
+def _download_sync(request, fd):
+    http = _request_http(request)
+    if http is None:
+        fd.write(_timed(request.methodId, request.execute))
+        return
+    from googleapiclient.http import MediaIoBaseDownload
+
+    # MediaIoBaseDownload sends every chunk with request.http, so point it at
+    # this thread's Http for the whole download.
+    request.http = http
+    downloader = MediaIoBaseDownload(fd, request, chunksize=DRIVE_UPLOAD_CHUNK_SIZE)
+    done = False
+    while not done:
+        _, done = _timed(
+            f"{request.methodId}.chunk",
+            lambda: downloader.next_chunk(num_retries=DRIVE_UPLOAD_RETRIES),
+        )
+
+
+def _batch_sync(service, requests):
+    """Send `requests` as one batch; returns a response or exception per request."""
+    results = [None] * len(requests)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = exception if exception is not None else response
+
+    batch = service.new_batch_http_request(callback=callback)
+    for index, request in enumerate(requests):
+        batch.add(request, request_id=str(index))
+    http = _request_http(requests[0])
+    _timed("drive.batch", lambda: batch.execute(http=http))
+    return results
+
+
+async def execute(request):
+    """Run a googleapiclient request on the Drive executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_drive_executor, _execute_sync, request)
+
+
+async def execute_upload(request):
+    """Run a resumable media upload chunk by chunk on the Drive executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_drive_executor, _upload_sync, request)
+
+
+async def execute_download(request, fd):
+    """Download a media request into the binary file `fd`, chunk by chunk, on the Drive executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_drive_executor, _download_sync, request, fd)
+
+
+async def get_root_folder(service, root_name=ROOT_FOLDER_NAME):
+    if root_name in _root_folder_ids:
+        return _root_folder_ids[root_name]
+
+    response = await execute(service.files().list(
         q=f"name='{root_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false",
         fields="files(id, name)"
-    ).execute()
+    ))
 
     if response["files"]:
-        return response["files"][0]["id"]
+        folder_id = response["files"][0]["id"]
+    else:
+        folder_metadata = {
+            "name": root_name,
+            "mimeType": "application/vnd.google-apps.folder"
+        }
+        folder = await execute(service.files().create(body=folder_metadata, fields="id"))
+        folder_id = folder["id"]
 
-    folder_metadata = {
-        "name": root_name,
-        "mimeType": "application/vnd.google-apps.folder"
-    }
-    folder = service.files().create(body=folder_metadata, fields="id").execute()
-    return folder["id"]
+    _root_folder_ids[root_name] = folder_id
+    return folder_id
 
-def get_customer_folder(service, root_folder_id, customer_id):
-    response = service.files().list(
+async def get_customer_folder(service, root_folder_id, customer_id):
+    response = await execute(service.files().list(
         q=f"name='{customer_id}' and '{root_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
         fields="files(id, name)"
-    ).execute()
+    ))
 
     if response["files"]:
         return response["files"][0]["id"]
 
+    return await create_customer_folder(service, root_folder_id, customer_id)
+
+async def create_customer_folder(service, root_folder_id, customer_id):
+    """Create a customer folder without checking for an existing one first."""
     folder_metadata = {
         "name": customer_id,
         "mimeType": "application/vnd.google-apps.folder",
         "parents": [root_folder_id],
     }
-    folder = service.files().create(body=folder_metadata, fields="id").execute()
+    folder = await execute(service.files().create(body=folder_metadata, fields="id"))
     return folder["id"]
 
+def set_drive_service(service):
+    """Install the process-wide Drive client, e.g. a local stand-in for benchmarks."""
+    global _drive_service
+    with _service_lock:
+        _drive_service = service
+        _root_folder_ids.clear()
+
 def get_drive_service():
-    """Authenticate and return a Google Drive service client."""
-    creds = Credentials.from_authorized_user_file(
-        "credentials.json",
-        ["https://www.googleapis.com/auth/drive"]
-    )
-    return build("drive", "v3", credentials=creds)
+    """Return the process-wide Google Drive service client."""
+    global _drive_service
+    if _drive_service is None:
+        with _service_lock:
+            if _drive_service is None:
+                from googleapiclient.discovery import build
+                from google.oauth2.credentials import Credentials
+
+                creds = Credentials.from_authorized_user_file(DRIVE_CREDENTIALS_FILE, DRIVE_SCOPES)
+                _drive_service = build("drive", "v3", credentials=creds, cache_discovery=False)
+    return _drive_service
+
+async def trash_file(drive_service, file_id):
+    """Move a Drive file or folder to Trash."""
+    return await execute(drive_service.files().update(
+        fileId=file_id,
+        body={"trashed": True}
+    ))
+
+async def execute_batch(service, requests):
+    """
+    Run several googleapiclient requests as Drive batch requests on the Drive
+    executor. Returns, in order, each request's response or the exception it
+    failed with.
+    """
+    loop = asyncio.get_running_loop()
+    results = []
+    for start in range(0, len(requests), DRIVE_BATCH_LIMIT):
+        results += await loop.run_in_executor(
+            _drive_executor, _batch_sync, service, requests[start:start + DRIVE_BATCH_LIMIT]
+        )
+    return results
+
+async def trash_files(drive_service, file_ids):
+    """
+    Move several Drive files to Trash in one batch request. Returns the
+    exception for each file that could not be trashed, or None, in order.
+    """
+    if not file_ids:
+        return []
+    results = await execute_batch(drive_service, [
+        drive_service.files().update(fileId=file_id, body={"trashed": True})
+        for file_id in file_ids
+    ])
+    return [result if isinstance(result, Exception) else None for result in results]
+
+async def download_file(drive_service, file_id, fd):
+    """Stream a Drive file's content into the binary file `fd`."""
+    await execute_download(drive_service.files().get_media(fileId=file_id), fd)
 
 async def upload_file_to_drive(drive_service, customer_folder_id, file):
-    """Uploads file directly to Drive (no local storage)."""
-    file_content = await file.read()  # read file in memory
-    media = MediaIoBaseUpload(io.BytesIO(file_content), mimetype=file.content_type)
+    """
+    Stream an UploadFile to Drive in resumable chunks. The spooled file is
+    read one chunk at a time, never loaded into memory as a whole.
+    """
+    from googleapiclient.http import MediaIoBaseUpload
+
+    await file.seek(0)
+    media = MediaIoBaseUpload(
+        file.file,
+        mimetype=file.content_type or "application/octet-stream",
+        chunksize=DRIVE_UPLOAD_CHUNK_SIZE,
+        resumable=True,
+    )
     file_metadata = {
         "name": file.filename,
         "parents": [customer_folder_id],
     }
 
-    uploaded = drive_service.files().create(
+    uploaded = await execute_upload(drive_service.files().create(
         body=file_metadata,
         media_body=media,
         fields="id, name, webViewLink"
-    ).execute()
+    ))
 
     return {
         "file_name": uploaded["name"],
         "google_drive_id": uploaded["id"],
         "download_link": uploaded["webViewLink"],
-    }
\ No newline at end of file
+    }
+
+async def upload_files_to_drive(drive_service, customer_folder_id, files: dict, return_exceptions: bool = False):
+    """
+    Upload several files concurrently, at most DRIVE_UPLOADS_PER_REQUEST at a
+    time. `files` maps a document key to an UploadFile (or None); the result
+    maps each uploaded key to its Drive file info, or with return_exceptions
+    to the exception its upload failed with.
+
+    Without return_exceptions, the first failure cancels the uploads still
+    waiting for a slot, waits for the running ones (their executor threads
+    can't be interrupted) and trashes every file that made it to Drive
+    before re-raising, so a failed request leaves no orphaned files.
+    """
+    semaphore = asyncio.Semaphore(DRIVE_UPLOADS_PER_REQUEST)
+    started = set()
+    failed = asyncio.Event()
+
+    async def upload(key, file):
+        async with semaphore:
+            if failed.is_set():
+                raise asyncio.CancelledError()
+            started.add(key)
+            try:
+                return await upload_file_to_drive(drive_service, customer_folder_id, file)
+            except Exception:
+                if not return_exceptions:
+                    failed.set()
+                raise
+
+    tasks = {
+        key: asyncio.create_task(upload(key, file))
+        for key, file in files.items() if file
+    }
+    try:
+        if return_exceptions:
+            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+            return dict(zip(tasks.keys(), results))
+
+        await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks.values():
+            if task.done() and task.exception() is not None:
+                raise task.exception()
+        return {key: task.result() for key, task in tasks.items()}
+    except BaseException:
+        for key, task in tasks.items():
+            if key not in started:
+                task.cancel()
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        file_ids = [result["google_drive_id"] for result in results if isinstance(result, dict)]
+        try:
+            errors = await trash_files(drive_service, file_ids)
+        except Exception as e:
+            errors = [e] * len(file_ids)
+        for file_id, error in zip(file_ids, errors):
+            if error is not None:
+                print(f"⚠️ Could not trash orphaned upload {file_id}: {error}")
+        raise
@@ -0,0 +1,120 @@
+"""
+Prometheus metrics for HTTP routes, Mongo commands, Drive calls and SMTP.
+
+Each uvicorn worker keeps its own registry. When running several workers,
+set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates across all of them.
+"""
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from pymongo import monitoring
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ["method", "route"]
+)
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "Mongo command latency.", ["collection", "command"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+MONGO_FAILURES = Counter(
+    "mongo_command_failures_total", "Failed Mongo commands.", ["collection", "command"]
+)
+DRIVE_LATENCY = Histogram(
+    "drive_request_duration_seconds", "Google Drive API call latency.", ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+DRIVE_ERRORS = Counter(
+    "drive_request_errors_total", "Failed Google Drive API calls.", ["operation"]
+)
+SMTP_LATENCY = Histogram(
+    "smtp_send_duration_seconds", "Latency of a single SMTP send.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+SMTP_ERRORS = Counter(
+    "smtp_send_errors_total", "Failed SMTP sends by exception type.", ["error"]
+)
+EMAIL_DROPPED = Counter(
+    "email_outbox_dropped_total", "Emails the outbox gave up on, by reason.", ["reason"]
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count and latency per route template
+    (e.g. /admin/users/{role}), so path parameters don't explode the labels.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every Mongo command, labelled by collection and command name."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        else:
+            collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        self._pending[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_FAILURES.labels(collection, event.command_name).inc()
+
+
+mongo_command_listener = MongoCommandListener()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """The metrics exposition body and its content type."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,70 @@
+"""
+Opaque-cursor keyset pagination over (created_at, _id), newest first.
+
+A cursor encodes the sort key of the last item on a page. The next page
+starts strictly after it, so every page is served from an index range scan
+and its cost does not grow with depth. Documents without `created_at` sort
+last, after every dated document.
+"""
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException
+
+SORT = [("created_at", -1), ("_id", -1)]
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(doc: dict) -> str:
+    created_at = doc.get("created_at")
+    _id = doc["_id"]
+    payload = {
+        "t": created_at.isoformat() if isinstance(created_at, datetime) else None,
+        "i": str(_id),
+        "o": isinstance(_id, ObjectId),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, object]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        created_at = datetime.fromisoformat(payload["t"]) if payload["t"] else None
+        _id = ObjectId(payload["i"]) if payload["o"] else payload["i"]
+        return created_at, _id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(query: dict, cursor: str | None) -> dict:
+    """Combine a list filter with the "after this cursor" condition."""
+    if not cursor:
+        return query
+
+    created_at, _id = decode_cursor(cursor)
+    if created_at is None:
+        after = {"created_at": None, "_id": {"$lt": _id}}
+    else:
+        after = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": _id}},
+            {"created_at": None},
+        ]}
+    return {"$and": [query, after]} if query else after
+
+
+def page(items: list, limit: int) -> dict:
+    """
+    Build the response for a page fetched with limit + 1 documents; the extra
+    one only tells us whether another page exists.
+    """
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if has_more else None,
+    }
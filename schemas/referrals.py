@@ -0,0 +1,86 @@
+from pymongo import UpdateMany
+from config.database import users_collection, referrals_collection
+
+
+async def sync_referrer_fields(referral_id: str | None, name: str | None = None, email: str | None = None):
+    """
+    Copy a referrer's current name and email onto every referral they made.
+    Referrals store these fields so list_referrals does not need a $lookup.
+    """
+    updates = {}
+    if name is not None:
+        updates["referrerName"] = name
+    if email is not None:
+        updates["referrerEmail"] = email
+    if not referral_id or not updates:
+        return
+    await referrals_collection.update_many({"referralId": referral_id}, {"$set": updates})
+
+
+REFERRER_PROJECTION = {"name": 1, "email": 1, "referralId": 1}
+
+
+async def load_referrer(user_id: str) -> dict | None:
+    """
+    The referrer's current name, email and referralId, read from the users
+    collection. The authenticated user object may come from a per-process
+    cache, so it is not used for fields that get stored on referrals.
+    """
+    return await users_collection.find_one({"_id": user_id}, REFERRER_PROJECTION)
+
+
+async def reconcile_referrer_fields(referrer: dict, referral_ids: list):
+    """
+    Re-check the referrer after inserting `referral_ids`. A rename that
+    landed between load_referrer and the insert has already run its
+    update_many, so it missed the new referrals; copy the new values over.
+    """
+    current = await load_referrer(referrer["_id"])
+    if not current or not referral_ids:
+        return
+    updates = {}
+    if current.get("name") != referrer.get("name"):
+        updates["referrerName"] = current.get("name")
+    if current.get("email") != referrer.get("email"):
+        updates["referrerEmail"] = current.get("email")
+    if updates:
+        await referrals_collection.update_many({"_id": {"$in": referral_ids}}, {"$set": updates})
+
+
+async def sync_referrer_names(names: dict):
+    """sync_referrer_fields for many referrers at once: referralId -> new name."""
+    operations = [
+        UpdateMany({"referralId": referral_id}, {"$set": {"referrerName": name}})
+        for referral_id, name in names.items()
+        if referral_id
+    ]
+    if operations:
+        await referrals_collection.bulk_write(operations, ordered=False)
+
+
+async def backfill_referrer_fields(batch_size: int = 500) -> int:
+    """
+    Set referrerName/referrerEmail on all existing referrals from the users
+    collection, one bulk_write per batch of referrers. Returns the number of
+    referrals modified.
+    """
+    modified = 0
+    operations = []
+    cursor = users_collection.find(
+        {"referralId": {"$exists": True, "$ne": None}},
+        {"referralId": 1, "name": 1, "email": 1},
+        batch_size=batch_size,
+    )
+    async for user in cursor:
+        operations.append(UpdateMany(
+            {"referralId": user["referralId"]},
+            {"$set": {"referrerName": user.get("name"), "referrerEmail": user.get("email")}},
+        ))
+        if len(operations) >= batch_size:
+            result = await referrals_collection.bulk_write(operations, ordered=False)
+            modified += result.modified_count
+            operations = []
+    if operations:
+        result = await referrals_collection.bulk_write(operations, ordered=False)
+        modified += result.modified_count
+    return modified
@@ -0,0 +1,30 @@
+"""
+Fast JSON responses for Mongo documents.
+
+BSONJSONResponse renders content with orjson and converts BSON-only types
+(ObjectId, Decimal128, Binary...) on the fly, so handlers can return raw
+Motor documents without rewriting `_id` or running jsonable_encoder first.
+datetimes are handled natively by orjson.
+"""
+import orjson
+from bson import ObjectId, Decimal128, Binary
+from fastapi.responses import JSONResponse
+
+
+def _bson_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Binary):
+        return value.hex()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps_bson(content) -> bytes:
+    return orjson.dumps(content, default=_bson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class BSONJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_bson(content)
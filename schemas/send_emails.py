@@ -1,14 +1,13 @@
 from email.message import EmailMessage
 from dotenv import find_dotenv, load_dotenv
 import os
-import smtplib
 from email.mime.text import MIMEText
+from schemas.email_outbox import outbox
 
 dotenv_path = find_dotenv()
 load_dotenv(dotenv_path)
 
 email_address = os.getenv("email_address")
-email_password = os.getenv("email_password")
 
 
 RESET_TOKEN_EXPIRE_MINUTES = 60
@@ -23,21 +22,12 @@ async def send_verification_email(to_email: str, code: str):
     msg["From"] = email_address
     msg["To"] = to_email
 
-    smtp_server = "smtp.hostinger.com"
-    smtp_port = 465
-
-    try:
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(email_address, email_password)
-            server.send_message(msg)
-            print('sent')
-    except Exception as e:
-        print(f"Email send failed: {e}")
+    outbox.enqueue(msg)
 
 
 def send_email(to_email: str, reset_link: str):
     """
-    Send the password reset link via email.
+    Queue the password reset link email on the outbox.
     """
     msg = EmailMessage()
 
@@ -60,14 +50,12 @@ www.aaifinancials.com
     msg["From"] = email_address
     msg["To"] = to_email
     msg.set_content(message)
-    
-    with smtplib.SMTP_SSL("smtp.hostinger.com", 465) as smtp:
-        smtp.login(email_address, email_password)
-        smtp.send_message(msg)
+
+    outbox.enqueue(msg)
 
 def send_referral_email(to_email: str, referrer_email: str, referral_id: str):
     """
-    Send referral email to the referred person.
+    Queue the referral email to the referred person on the outbox.
     """
     msg = EmailMessage()
 
@@ -91,12 +79,5 @@ www.aaifinancials.com
     msg["From"] = email_address
     msg["To"] = to_email
     msg.set_content(message)
-    print(msg)
-
-    try:
-        with smtplib.SMTP_SSL("smtp.hostinger.com", 465) as smtp:
-            smtp.login(email_address, email_password)
-            smtp.send_message(msg)
-        print("Referral email sent successfully")
-    except Exception as e:
-        print(f"Failed to send referral email: {e}")
+
+    outbox.enqueue(msg)
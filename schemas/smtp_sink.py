@@ -0,0 +1,138 @@
+"""
+Local stand-in SMTP server for tests and benchmarks.
+
+Accepts any login and any message and keeps what it receives in memory. It
+speaks plain SMTP, so point the outbox at it with SMTP_USE_SSL=false:
+
+    python -m schemas.smtp_sink --port 1025
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_USE_SSL=false uvicorn main:app
+"""
+import argparse
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink: "SMTPSink" = self.server.sink
+        self.reply("220 smtp-sink ESMTP")
+        sink.connections += 1
+        mail_from, rcpt_to = None, []
+
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self.reply("250-smtp-sink")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif verb == "HELO":
+                self.reply("250 smtp-sink")
+            elif verb == "AUTH":
+                if line.upper().startswith("AUTH LOGIN"):
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = line[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(line[8:].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = bytearray()
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    if chunk.startswith(b".."):
+                        chunk = chunk[1:]
+                    data += chunk
+                if sink.delay:
+                    time.sleep(sink.delay)
+                sink.record(mail_from, rcpt_to, bytes(data))
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                if verb == "RSET":
+                    mail_from, rcpt_to = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """
+    Threaded SMTP sink. `delay` adds a pause per message to simulate a slow
+    mail host. Use as a context manager or call start()/stop().
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.delay = delay
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def record(self, mail_from, rcpt_to, data: bytes):
+        with self._lock:
+            self.messages.append({
+                "from": mail_from,
+                "to": list(rcpt_to),
+                "message": message_from_bytes(data),
+            })
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to stall per message")
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.delay)
+    print(f"SMTP sink listening on {args.host}:{args.port}")
+    try:
+        sink._server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Received {len(sink.messages)} message(s) over {sink.connections} connection(s)")
@@ -0,0 +1,301 @@
+"""
+Document storage backends.
+
+Mortgage documents are stored through a StorageBackend, chosen with
+STORAGE_BACKEND:
+
+* "drive" (default): Google Drive, one folder per customer.
+* "local": the local filesystem under STORAGE_LOCAL_ROOT, for tests and
+  on-prem installs. Files are streamed to disk and named by their SHA-256,
+  so a customer folder holds <STORAGE_LOCAL_ROOT>/<folder_id>/<sha256>.
+
+Each application records the backend that stored its documents ("storage"),
+so switching STORAGE_BACKEND only affects new applications.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from uuid import uuid4
+from schemas import gdrive_upload
+from schemas.document_cache import document_cache
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "drive").lower()
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "storage")
+# Public URL prefix for local files, e.g. served by a reverse proxy. Without
+# it local files have no download_link and are read through GET /documents.
+STORAGE_LOCAL_BASE_URL = os.getenv("STORAGE_LOCAL_BASE_URL", "")
+STORAGE_LOCAL_WORKERS = int(os.getenv("STORAGE_LOCAL_WORKERS", "4"))
+_LOCAL_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend:
+    """
+    Where uploaded documents live. File infos returned by put() are stored in
+    an application's uploaded_files and handed back to trash(), get_link()
+    and local_path().
+    """
+
+    name = ""
+    uploads_per_request = 4
+
+    async def create_folder(self, customer_id: str) -> str:
+        raise NotImplementedError
+
+    async def find_folder(self, application: dict) -> str | None:
+        """The folder holding an application's documents, or None if it is gone."""
+        raise NotImplementedError
+
+    async def put(self, folder_id: str, file) -> dict:
+        raise NotImplementedError
+
+    async def trash(self, file_info: dict):
+        raise NotImplementedError
+
+    async def trash_folder(self, folder_id: str):
+        raise NotImplementedError
+
+    async def get_link(self, file_info: dict) -> str | None:
+        return file_info.get("download_link")
+
+    async def local_path(self, file_info: dict) -> Path:
+        """A local file with the document's content, for serving it directly."""
+        raise NotImplementedError
+
+    def etag(self, file_info: dict) -> str:
+        """A strong ETag; stored content never changes, so an ID will do."""
+        raise NotImplementedError
+
+    def content_type(self, file_info: dict) -> str:
+        return (
+            file_info.get("content_type")
+            or mimetypes.guess_type(file_info.get("file_name") or "")[0]
+            or "application/octet-stream"
+        )
+
+    async def folder_for(self, application: dict) -> str:
+        """Like find_folder, but creates the folder if it doesn't exist."""
+        folder_id = await self.find_folder(application)
+        if folder_id is None:
+            folder_id = await self.create_folder(application["customerId"])
+        return folder_id
+
+    async def put_many(self, folder_id: str, files: dict, return_exceptions: bool = False) -> dict:
+        """
+        Store several files concurrently. `files` maps a document key to an
+        UploadFile (or None); the result maps each stored key to its file info,
+        or with return_exceptions to the exception storing it failed with.
+        """
+        semaphore = asyncio.Semaphore(self.uploads_per_request)
+
+        async def put(file):
+            async with semaphore:
+                return await self.put(folder_id, file)
+
+        pending = {key: file for key, file in files.items() if file}
+        results = await asyncio.gather(*(put(file) for file in pending.values()), return_exceptions=return_exceptions)
+        return dict(zip(pending.keys(), results))
+
+    async def trash_many(self, file_infos: list[dict]) -> list[Exception | None]:
+        """Trash several files; returns the exception for each failure, or None, in order."""
+        return await asyncio.gather(*(self.trash(info) for info in file_infos), return_exceptions=True)
+
+    def same_file(self, a: dict, b: dict) -> bool:
+        return False
+
+    def unreferenced(self, file_infos: list[dict], uploaded_files: dict) -> list[dict]:
+        """
+        The file infos in `file_infos` that no entry of `uploaded_files`
+        still points at, i.e. those that are safe to trash.
+        """
+        live = [info for info in (uploaded_files or {}).values() if info]
+        return [
+            info for info in file_infos
+            if not any(self.same_file(info, other) for other in live)
+        ]
+
+
+class DriveStorage(StorageBackend):
+    name = "drive"
+    uploads_per_request = gdrive_upload.DRIVE_UPLOADS_PER_REQUEST
+
+    async def create_folder(self, customer_id):
+        service = gdrive_upload.get_drive_service()
+        root_folder_id = await gdrive_upload.get_root_folder(service)
+        return await gdrive_upload.create_customer_folder(service, root_folder_id, customer_id)
+
+    async def find_folder(self, application):
+        folder_id = application.get("storage_folder_id") or application.get("drive_folder_id")
+        if folder_id:
+            return folder_id
+        service = gdrive_upload.get_drive_service()
+        root_folder_id = await gdrive_upload.get_root_folder(service)
+        response = await gdrive_upload.execute(service.files().list(
+            q=f"name='{application['customerId']}' and '{root_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
+            fields="files(id, name)"
+        ))
+        files = response.get("files", [])
+        return files[0]["id"] if files else None
+
+    async def put(self, folder_id, file):
+        return await gdrive_upload.upload_file_to_drive(gdrive_upload.get_drive_service(), folder_id, file)
+
+    async def put_many(self, folder_id, files, return_exceptions=False):
+        return await gdrive_upload.upload_files_to_drive(
+            gdrive_upload.get_drive_service(), folder_id, files, return_exceptions
+        )
+
+    async def trash(self, file_info):
+        if "google_drive_id" in file_info:
+            await gdrive_upload.trash_file(gdrive_upload.get_drive_service(), file_info["google_drive_id"])
+
+    async def trash_many(self, file_infos):
+        """All the trash calls go to Drive as a single batch request."""
+        file_ids = [info.get("google_drive_id") for info in file_infos]
+        errors = await gdrive_upload.trash_files(
+            gdrive_upload.get_drive_service(), [file_id for file_id in file_ids if file_id]
+        )
+        errors = iter(errors)
+        return [next(errors) if file_id else None for file_id in file_ids]
+
+    async def trash_folder(self, folder_id):
+        await gdrive_upload.trash_file(gdrive_upload.get_drive_service(), folder_id)
+
+    async def local_path(self, file_info):
+        file_id = file_info["google_drive_id"]
+        service = gdrive_upload.get_drive_service()
+        return await document_cache.get(
+            file_id, lambda fd: gdrive_upload.download_file(service, file_id, fd)
+        )
+
+    def etag(self, file_info):
+        return f'"{file_info["google_drive_id"]}"'
+
+    def same_file(self, a, b):
+        return a.get("google_drive_id") == b.get("google_drive_id")
+
+
+class LocalStorage(StorageBackend):
+    """
+    Documents on the local filesystem. Disk I/O runs on a small thread pool;
+    uploads are hashed while they are copied, so each file is read once.
+    Trashed files and folders are moved to <root>/.trash, not deleted.
+
+    Identical uploads to one folder share a single file, so callers must
+    only trash files that unreferenced() reports as unused.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str = STORAGE_LOCAL_ROOT, base_url: str = STORAGE_LOCAL_BASE_URL):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self._executor = ThreadPoolExecutor(max_workers=STORAGE_LOCAL_WORKERS, thread_name_prefix="storage")
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _folder(self, folder_id: str) -> Path:
+        if not folder_id or "/" in folder_id or "\\" in folder_id or folder_id.startswith("."):
+            raise ValueError(f"Invalid folder id: {folder_id!r}")
+        return self.root / folder_id
+
+    def path(self, file_info: dict) -> Path:
+        """Absolute path of a stored file."""
+        path = (self.root / file_info["storage_path"]).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid storage path: {file_info['storage_path']!r}")
+        return path
+
+    async def create_folder(self, customer_id):
+        await self._run(lambda: self._folder(customer_id).mkdir(parents=True, exist_ok=True))
+        return customer_id
+
+    async def find_folder(self, application):
+        folder_id = application.get("storage_folder_id") or application.get("customerId")
+        exists = await self._run(self._folder(folder_id).is_dir)
+        return folder_id if exists else None
+
+    def _write(self, folder_id, source):
+        folder = self._folder(folder_id)
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp_path = folder / f".upload-{uuid4().hex}"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as out:
+                while chunk := source.read(_LOCAL_CHUNK_SIZE):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            os.replace(tmp_path, folder / sha256)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return sha256, size
+
+    async def put(self, folder_id, file):
+        await file.seek(0)
+        sha256, size = await self._run(self._write, folder_id, file.file)
+        file_info = {
+            "file_name": file.filename,
+            "storage_path": f"{folder_id}/{sha256}",
+            "sha256": sha256,
+            "size": size,
+            "content_type": file.content_type or "application/octet-stream",
+        }
+        file_info["download_link"] = await self.get_link(file_info)
+        return file_info
+
+    def _move_to_trash(self, path: Path):
+        if not path.exists():
+            return
+        trash = self.root / ".trash"
+        trash.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), str(trash / f"{int(time.time())}-{uuid4().hex[:8]}-{path.name}"))
+
+    async def trash(self, file_info):
+        if "storage_path" in file_info:
+            await self._run(self._move_to_trash, self.path(file_info))
+
+    async def trash_folder(self, folder_id):
+        await self._run(self._move_to_trash, self._folder(folder_id))
+
+    async def get_link(self, file_info):
+        if self.base_url:
+            return f"{self.base_url}/{file_info['storage_path']}"
+        return None
+
+    async def local_path(self, file_info):
+        return self.path(file_info)
+
+    def etag(self, file_info):
+        return f'"{file_info["sha256"]}"'
+
+    def same_file(self, a, b):
+        return a.get("storage_path") == b.get("storage_path")
+
+
+_BACKENDS = {"drive": DriveStorage, "local": LocalStorage}
+_instances: dict[str, StorageBackend] = {}
+
+
+def get_storage(name: str | None = None) -> StorageBackend:
+    """The backend called `name`, by default the configured STORAGE_BACKEND."""
+    name = name or STORAGE_BACKEND
+    if name not in _instances:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown storage backend: {name!r}")
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+def storage_for(application: dict) -> StorageBackend:
+    """The backend holding an application's documents (Drive for older applications)."""
+    return get_storage(application.get("storage", "drive"))
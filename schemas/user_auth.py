@@ -1,10 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Annotated, List
+import os
+import time
+import hashlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
+from cachetools import TTLCache, TLRUCache
 from models.user_models import UserInDB, TokenData
 from config.database import users_collection, SECRET_KEY, ALGORITHM
 import jwt
@@ -15,7 +21,47 @@ import string
 ACCESS_TOKEN_EXPIRE_SECONDS = 3600
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Authenticated users are cached per process by email (LRU with TTL) so that
+# get_current_user does not hit Mongo on every request. Every write path that
+# changes a user must call invalidate_user(); the TTL bounds staleness for
+# writes made by other worker processes.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_generation = 0
+
+# Verified access-token claims, keyed by a SHA-256 digest of the token and
+# evicted at the token's own `exp`, so the signature is checked once per
+# token per process instead of once per request.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+_token_cache = TLRUCache(
+    maxsize=TOKEN_CACHE_SIZE,
+    ttu=lambda _key, claims, _now: claims["exp"],
+    timer=time.time,
+)
+_cache_stats = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0}
+
+# bcrypt cost comes from configuration. Pinning min and max rounds to the
+# same value makes passlib flag hashes made at any other cost as needing an
+# update, so they are rehashed on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL while hashing, so a thread pool keeps that CPU
+# work off the event loop. PASSWORD_HASH_WORKERS caps how many hashes run
+# at once per process.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -26,6 +72,22 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password_async(password: str) -> str:
+    """hash_password() on the password worker pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, hash_password, password)
+
+async def verify_and_update_password(plain_password, hashed_password):
+    """
+    Verify a password on the password worker pool. Returns (valid, new_hash);
+    new_hash is set when the stored hash was made with a different cost and
+    should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     to_encode.update({
@@ -56,12 +118,75 @@ async def get_user(email: str):
         return UserInDB(**user_dict)
     return None
 
+async def get_cached_user(email: str):
+    """get_user() served from the in-process user cache."""
+    user = _user_cache.get(email)
+    if user is not None:
+        _cache_stats["user_hits"] += 1
+        return user
+
+    _cache_stats["user_misses"] += 1
+    generation = _user_cache_generation
+    user = await get_user(email)
+    # Skip caching if an invalidation ran while we were reading, otherwise
+    # we could put back the pre-update document.
+    if user is not None and generation == _user_cache_generation:
+        _user_cache[email] = user
+    return user
+
+def invalidate_user(email: str | None = None):
+    """Drop one cached user, or the whole cache when no email is given."""
+    global _user_cache_generation
+    _user_cache_generation += 1
+    if email is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(email, None)
+
+def decode_token(token: str) -> dict:
+    """
+    Verify a JWT and return its claims, served from the token cache when the
+    same token was verified before. Raises InvalidTokenError like jwt.decode.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = _token_cache.get(key)
+    if claims is not None:
+        _cache_stats["token_hits"] += 1
+        return claims
+
+    _cache_stats["token_misses"] += 1
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if isinstance(claims.get("exp"), (int, float)):
+        _token_cache[key] = claims
+    return claims
+
+def auth_cache_stats() -> dict:
+    """Hit/miss counters and current sizes of the token and user caches."""
+    return {
+        "token_cache": {
+            "hits": _cache_stats["token_hits"],
+            "misses": _cache_stats["token_misses"],
+            "size": len(_token_cache),
+            "maxsize": _token_cache.maxsize,
+        },
+        "user_cache": {
+            "hits": _cache_stats["user_hits"],
+            "misses": _cache_stats["user_misses"],
+            "size": len(_user_cache),
+            "maxsize": _user_cache.maxsize,
+        },
+    }
+
 async def authenticate_user(email: str, password: str):
     user = await get_user(email)
     if not user:
         return False	
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        await users_collection.update_one({"email": email}, {"$set": {"password": new_hash}})
+        invalidate_user(email)
     return user
 
 
@@ -73,7 +198,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         if payload.get("scope") != "access":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -88,7 +213,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     except InvalidTokenError:
         raise credentials_exception
     
-    user = await get_user(email=token_data.email)
+    user = await get_cached_user(email=token_data.email)
 
     if user is None:
         raise credentials_exception